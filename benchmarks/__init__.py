@@ -0,0 +1,5 @@
+"""
+Benchmarks for Clarify's report parser
+
+Run ``python -m benchmarks.run --help`` from the repository root for usage.
+"""
@@ -0,0 +1,174 @@
+"""
+Generate synthetic Clarity detail XML reports of arbitrary size
+"""
+import random
+
+from lxml import etree
+
+DEFAULT_VOTE_TYPES = [
+    "Election Day",
+    "Absentee by Mail",
+    "Advance in Person",
+    "Provisional",
+]
+
+NO_CHOICE_VOTE_TYPES = [
+    "Undervotes",
+    "Overvotes",
+]
+
+PARTIES = ["DEM", "REP", "LIB", "GRN", "IND"]
+
+
+def jurisdiction_names(counties, precincts):
+    """
+    Get the names of the result jurisdictions of a synthetic report
+
+    Args:
+        counties: Number of counties
+        precincts: Number of precincts per county, or 0 for a county-level
+            (statewide summary) report
+
+    Returns:
+        List of jurisdiction names
+
+    """
+    if not precincts:
+        return ["County {}".format(c) for c in range(1, counties + 1)]
+    return [
+        "County {} Precinct {}".format(c, p)
+        for c in range(1, counties + 1)
+        for p in range(1, precincts + 1)
+    ]
+
+
+def generate_report(f, counties=10, precincts=20, contests=10, choices=4,
+                    vote_types=4, seed=0):
+    """
+    Write a synthetic detail XML report
+
+    The report follows the ``ElectionResult/VoterTurnout/Contest/Choice/
+    VoteType/Precinct`` schema read by ``clarify.Parser``.  It is written
+    incrementally, so reports much larger than memory can be generated.
+
+    Args:
+        f: Filename or writable binary file-like object
+        counties: Number of counties
+        precincts: Number of precincts per county.  If 0, the report is a
+            county-level report with ``ElectionVoterTurnout`` and ``County``
+            elements, like a statewide summary.
+        contests: Number of contests
+        choices: Number of choices per contest
+        vote_types: Number of vote types per choice, up to 4
+        seed: Seed for the random vote counts
+
+    Returns:
+        Number of results in the report, that is, the expected length of
+        ``Parser.results``.
+
+    """
+    rng = random.Random(seed)
+    names = jurisdiction_names(counties, precincts)
+    level, container = ('Precinct', 'Precincts') if precincts else ('County', 'Counties')
+    vote_type_names = DEFAULT_VOTE_TYPES[:vote_types]
+    num_results = 0
+
+    with etree.xmlfile(f, encoding='utf-8') as xf:
+        xf.write_declaration()
+        with xf.element('ElectionResult'):
+            for tag, text in [
+                ('Timestamp', '11/13/2014 2:58:41 PM CST'),
+                ('ElectionName', 'Synthetic General Election'),
+                ('ElectionDate', '11/4/2014'),
+                ('Region', 'ZZ'),
+            ]:
+                el = etree.Element(tag)
+                el.text = text
+                xf.write(el)
+
+            ballots_cast = {n: rng.randint(100, 2000) for n in names}
+            total_voters = {n: ballots_cast[n] * 2 for n in names}
+            turnout_tag = 'VoterTurnout' if precincts else 'ElectionVoterTurnout'
+            with xf.element(turnout_tag, {
+                'totalVoters': str(sum(total_voters.values())),
+                'ballotsCast': str(sum(ballots_cast.values())),
+                'voterTurnout': '50.00',
+            }):
+                with xf.element(container):
+                    for name in names:
+                        attrs = {
+                            'name': name,
+                            'totalVoters': str(total_voters[name]),
+                            'ballotsCast': str(ballots_cast[name]),
+                            'voterTurnout': '50.00',
+                        }
+                        if precincts:
+                            attrs['percentReporting'] = '4'
+                        else:
+                            attrs.update({
+                                'precinctsParticipating': '20',
+                                'precinctsReported': '20',
+                                'precinctsReportingPercent': '100.00',
+                            })
+                        xf.write(etree.Element(level, attrs))
+
+            for contest in range(1, contests + 1):
+                contest_attrs = {
+                    'key': str(contest),
+                    'text': 'Contest {}'.format(contest),
+                    'voteFor': '1',
+                    'isQuestion': 'false',
+                }
+                if precincts:
+                    contest_attrs['precinctsReporting'] = str(len(names))
+                    contest_attrs['precinctsReported'] = str(len(names))
+                else:
+                    contest_attrs['countiesParticipating'] = str(len(names))
+                    contest_attrs['countiesReported'] = str(len(names))
+                with xf.element('Contest', contest_attrs):
+                    for vote_type in NO_CHOICE_VOTE_TYPES:
+                        num_results += _write_vote_type(xf, rng, vote_type, level, names, 10)
+
+                    for choice in range(1, choices + 1):
+                        el = etree.Element('Choice', {
+                            'key': str(choice),
+                            'text': 'Candidate {}-{}'.format(contest, choice),
+                            'party': PARTIES[(choice - 1) % len(PARTIES)],
+                            'totalVotes': '0',
+                        })
+                        for vote_type in vote_type_names:
+                            num_results += _append_vote_type(el, rng, vote_type, level, names, 500)
+                        el.set('totalVotes', str(sum(int(vt.get('votes')) for vt in el)))
+                        xf.write(el)
+
+    return num_results
+
+
+def _append_vote_type(parent, rng, vote_type, level, names, max_votes):
+    """
+    Append a ``VoteType`` element with one child per jurisdiction
+
+    Returns:
+        Number of results represented by the element
+    """
+    vt_el = etree.SubElement(parent, 'VoteType', {'name': vote_type})
+    total = 0
+    for name in names:
+        votes = rng.randint(0, max_votes)
+        total += votes
+        etree.SubElement(vt_el, level, {'name': name, 'votes': str(votes)})
+    vt_el.set('votes', str(total))
+    return len(names) + 1
+
+
+def _write_vote_type(xf, rng, vote_type, level, names, max_votes):
+    """
+    Write a ``VoteType`` element that isn't part of a ``Choice``
+
+    Returns:
+        Number of results represented by the element
+    """
+    parent = etree.Element('Contest')
+    num_results = _append_vote_type(parent, rng, vote_type, level, names, max_votes)
+    xf.write(parent[0])
+    return num_results
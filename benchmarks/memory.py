@@ -0,0 +1,136 @@
+"""
+Measure the memory held by parsed results, in bytes per result
+
+Usage::
+
+    python -m benchmarks.memory --counties 20 --precincts 50 --contests 40
+
+Allocations are traced with ``tracemalloc`` while each report is parsed, and
+the memory still allocated once parsing has finished, and the lxml tree has
+been freed, is divided by the number of results.  Each measurement runs in
+a fresh process.
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+import warnings
+
+from clarify.parser import Parser, Result
+
+from .generate import generate_report
+
+
+def _parse(path):
+    p = Parser()
+    p.parse(path, stream=True)
+    return p
+
+
+def _parse_columnar(path):
+    p = Parser(columnar=True)
+    p.parse(path, stream=True)
+    return p
+
+
+def _results_columnar(path):
+    # Columnar results are only built when they're accessed, so hold on to
+    # a list of them as well as the parser
+    p = _parse_columnar(path)
+    return p, list(p.results)
+
+
+PARSERS = {
+    'parse': _parse,
+    'parse_columnar': _parse_columnar,
+    'results_columnar': _results_columnar,
+}
+
+
+def _measure_one(name, path, queue):
+    warnings.simplefilter('ignore')
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = PARSERS[name](path)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    parser = held[0] if isinstance(held, tuple) else held
+    queue.put({
+        'name': name,
+        'results': len(parser.results),
+        'retained': retained,
+    })
+
+
+def measure(name, path):
+    """
+    Measure the memory retained by a single parser in a child process
+
+    Args:
+        name: Key of ``PARSERS``
+        path: Path of the XML report
+
+    Returns:
+        Dictionary of measurements
+
+    """
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure_one, args=(name, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def format_measurements(measurements):
+    """Format memory measurements as a text table"""
+    lines = ["{:<24}{:>12}{:>14}{:>14}".format('parser', 'results', 'retained MB', 'bytes/result')]
+    for m in measurements:
+        lines.append("{:<24}{:>12}{:>14.1f}{:>14.1f}".format(
+            m['name'],
+            m['results'],
+            m['retained'] / 1e6,
+            m['retained'] / max(m['results'], 1),
+        ))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--counties', type=int, default=20)
+    parser.add_argument('--precincts', type=int, default=50,
+                        help="Precincts per county, or 0 for a county-level report")
+    parser.add_argument('--contests', type=int, default=20)
+    parser.add_argument('--choices', type=int, default=4)
+    parser.add_argument('--vote-types', type=int, default=4)
+    parser.add_argument('parsers', nargs='*',
+                        help="Parsers to measure, from {} (default: all)".format(", ".join(PARSERS)))
+    args = parser.parse_args(argv)
+    for name in args.parsers:
+        if name not in PARSERS:
+            parser.error("unknown parser: {}".format(name))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'detail.xml')
+        generate_report(
+            path,
+            counties=args.counties,
+            precincts=args.precincts,
+            contests=args.contests,
+            choices=args.choices,
+            vote_types=args.vote_types,
+        )
+        measurements = [measure(name, path) for name in args.parsers or PARSERS]
+
+    print("Result object: {} bytes".format(sys.getsizeof(Result(None, None, None, 0, None))))
+    print(format_measurements(measurements))
+
+
+if __name__ == '__main__':
+    main()
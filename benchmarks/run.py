@@ -0,0 +1,229 @@
+"""
+Time Clarify's parser against synthetic detail XML reports
+
+Usage::
+
+    python -m benchmarks.run --counties 20 --precincts 50 --contests 40
+
+Each benchmark runs in a fresh process so that peak RSS is measured
+independently of the others.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import warnings
+import zipfile
+
+from clarify.parser import Parser
+
+from .generate import generate_report
+
+
+def _parse(paths):
+    p = Parser()
+    p.parse(paths['xml'])
+    return p, len(p.results)
+
+
+def _parse_stream(paths):
+    p = Parser()
+    p.parse(paths['xml'], stream=True)
+    return p, len(p.results)
+
+
+def _parse_columnar(paths):
+    p = Parser(columnar=True)
+    p.parse(paths['xml'])
+    return p, len(p.results)
+
+
+def _parse_stream_columnar(paths):
+    p = Parser(columnar=True)
+    p.parse(paths['xml'], stream=True)
+    return p, len(p.results)
+
+
+def _parse_zip(paths):
+    p = Parser()
+    p.parse_zip(paths['zip'])
+    return p, len(p.results)
+
+
+def _results(paths):
+    # Parse outside of the timed region, then time only the ``results``
+    # property.  Returning a callable tells the runner to do this.
+    p = Parser()
+    p.parse(paths['xml'])
+    return lambda: (p, len(p.results))
+
+
+def _iter_results(paths):
+    p = Parser()
+    count = 0
+    for _ in p.iter_results(paths['xml']):
+        count += 1
+    return p, count
+
+
+def _parse_totals(paths):
+    p = Parser()
+    p.parse(paths['xml'], detail_level='totals')
+    return p, len(p.results)
+
+
+def _peek(paths):
+    # Only reads the header, so there are no results
+    return Parser.peek(paths['xml']), 0
+
+
+BENCHMARKS = {
+    'parse': _parse,
+    'parse_stream': _parse_stream,
+    'parse_columnar': _parse_columnar,
+    'parse_stream_columnar': _parse_stream_columnar,
+    'parse_zip': _parse_zip,
+    'parse_totals': _parse_totals,
+    'results': _results,
+    'iter_results': _iter_results,
+    'peek': _peek,
+}
+
+
+def _max_rss():
+    """Peak resident set size of this process, in bytes"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _run_one(name, paths, queue):
+    warnings.simplefilter('ignore')
+    fn = BENCHMARKS[name]
+    rss_before = _max_rss()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    ret = fn(paths)
+    if callable(ret):
+        start = time.perf_counter()
+        ret = ret()
+    elapsed = time.perf_counter() - start
+    parser, num_results = ret
+    queue.put({
+        'name': name,
+        'seconds': elapsed,
+        'results': num_results,
+        'peak_rss': _max_rss() - rss_before,
+        # Blocks still allocated while the parser is alive approximate the
+        # number of objects it holds on to.
+        'allocated_blocks': sys.getallocatedblocks() - blocks_before,
+    })
+    del parser
+
+
+def run_benchmark(name, paths):
+    """
+    Run a single benchmark in a child process
+
+    Args:
+        name: Key of ``BENCHMARKS``
+        paths: Dictionary with the ``xml`` and ``zip`` paths of the report
+
+    Returns:
+        Dictionary of measurements
+
+    """
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_one, args=(name, paths, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def run_benchmarks(directory, names=None, repeat=1, **report_kwargs):
+    """
+    Generate a report and run benchmarks against it
+
+    Args:
+        directory: Directory in which to write the report files
+        names: Names of the benchmarks to run.  Defaults to all of them.
+        repeat: Number of times to run each benchmark.  The fastest run is
+            reported.
+        **report_kwargs: Arguments passed to ``generate_report``
+
+    Returns:
+        List of dictionaries of measurements, one per benchmark
+
+    """
+    paths = {
+        'xml': os.path.join(directory, 'detail.xml'),
+        'zip': os.path.join(directory, 'detailxml.zip'),
+    }
+    generate_report(paths['xml'], **report_kwargs)
+    with zipfile.ZipFile(paths['zip'], 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.write(paths['xml'], 'detail.xml')
+    size = os.path.getsize(paths['xml'])
+
+    measurements = []
+    for name in names or BENCHMARKS:
+        runs = [run_benchmark(name, paths) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r['seconds'])
+        best['bytes'] = size
+        measurements.append(best)
+    return measurements
+
+
+def format_measurements(measurements):
+    """Format benchmark measurements as a text table"""
+    lines = ["{:<24}{:>10}{:>12}{:>14}{:>10}{:>12}{:>16}".format(
+        'benchmark', 'seconds', 'results', 'us/result', 'MB/s', 'RSS MB', 'blocks')]
+    for m in measurements:
+        lines.append("{:<24}{:>10.3f}{:>12}{:>14.2f}{:>10.1f}{:>12.1f}{:>16}".format(
+            m['name'],
+            m['seconds'],
+            m['results'],
+            m['seconds'] / max(m['results'], 1) * 1e6,
+            m['bytes'] / m['seconds'] / 1e6,
+            m['peak_rss'] / 1e6,
+            m['allocated_blocks'],
+        ))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--counties', type=int, default=10)
+    parser.add_argument('--precincts', type=int, default=50,
+                        help="Precincts per county, or 0 for a county-level report")
+    parser.add_argument('--contests', type=int, default=20)
+    parser.add_argument('--choices', type=int, default=4)
+    parser.add_argument('--vote-types', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('benchmarks', nargs='*',
+                        help="Benchmarks to run, from {} (default: all)".format(", ".join(BENCHMARKS)))
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: {}".format(name))
+
+    with tempfile.TemporaryDirectory() as directory:
+        measurements = run_benchmarks(
+            directory,
+            names=args.benchmarks,
+            repeat=args.repeat,
+            counties=args.counties,
+            precincts=args.precincts,
+            contests=args.contests,
+            choices=args.choices,
+            vote_types=args.vote_types,
+        )
+    print(format_measurements(measurements))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
 from .version import __version__
+from .cache import HTTPCache
 from .jurisdiction import Jurisdiction
 from .parser import Parser
+from .batch import parse_many
+from .watch import VersionWatcher
@@ -0,0 +1,300 @@
+import asyncio
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .jurisdiction import LATEST_SUMMARY_PATHS, UNRESOLVED, BaseJurisdiction
+from .transport import HEAD_REJECTED_STATUSES, RETRY_STATUSES, UA_HEADER, TransportPolicy, probe_result
+
+
+class AsyncClient(object):
+
+    """
+    A pool of keep-alive HTTP connections shared by ``AsyncJurisdiction``
+    objects, with a limit on the number of requests in flight at once.
+    Requests follow a ``TransportPolicy``, like those of a ``Transport``.
+
+    Requires the ``httpx`` package, which can be installed with
+    ``pip install clarify[async]``.
+    """
+
+    def __init__(self, max_concurrency=10, client=None, policy=None, **kwargs):
+        """
+        Args:
+            max_concurrency: Maximum number of concurrent requests.
+            client: ``httpx.AsyncClient`` to send requests with.  By default,
+                one is created with a pool of ``max_concurrency``
+                connections.
+            policy: ``TransportPolicy`` for timeouts, retries and rate
+                limits.  Defaults to a ``TransportPolicy`` with its default
+                settings.
+            **kwargs: Additional arguments for the default
+                ``httpx.AsyncClient``.
+        """
+        if httpx is None:
+            raise ImportError("AsyncClient requires httpx. Install it with 'pip install clarify[async]'.")
+        if client is None:
+            limits = httpx.Limits(max_connections=max_concurrency,
+                                  max_keepalive_connections=max_concurrency)
+            client = httpx.AsyncClient(headers=UA_HEADER, limits=limits,
+                                       follow_redirects=True, **kwargs)
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.policy = policy if policy is not None else TransportPolicy()
+        self._timeout = self._get_timeout(self.policy.timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @classmethod
+    def _get_timeout(cls, timeout):
+        """
+        Convert a ``TransportPolicy`` timeout to an ``httpx.Timeout``
+        """
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    async def request(self, method, url, **kwargs):
+        """
+        Send a request, applying the client's policy and waiting for a free
+        slot if ``max_concurrency`` requests are already in flight.
+
+        Returns:
+            An ``httpx.Response``.  If the request still fails after the
+            policy's retries, the last response is returned or the last
+            exception raised.
+        """
+        kwargs.setdefault('timeout', self._timeout)
+        attempt = 0
+        while True:
+            delay = self.policy.get_host_delay(url)
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                async with self._semaphore:
+                    r = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.policy.retries:
+                    raise
+            else:
+                if r.status_code not in RETRY_STATUSES or attempt >= self.policy.retries:
+                    return r
+            attempt += 1
+            await asyncio.sleep(self.policy.get_backoff(attempt))
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def probe(self, url):
+        """
+        Check whether a URL exists without downloading it, as
+        ``clarify.transport.probe`` does.
+
+        Returns:
+            A ``ProbeResult``.
+        """
+        r = await self.request('HEAD', url)
+        if r.status_code in HEAD_REJECTED_STATUSES:
+            async with self._semaphore:
+                # The body isn't read, so hosts that ignore the Range header
+                # don't send the whole resource
+                async with self.client.stream('GET', url, headers={'Range': 'bytes=0-0'},
+                                              timeout=self._timeout) as r:
+                    pass
+        return probe_result(url, r)
+
+    async def download(self, url, output_fn):
+        """
+        Stream the body of a response to a file.
+
+        Returns:
+            The ``httpx.Response``.  The file is only written if the
+            response status is 200.
+        """
+        async with self._semaphore:
+            async with self.client.stream('GET', url, timeout=self._timeout) as r:
+                if r.status_code == 200:
+                    with open(output_fn, 'wb') as f:
+                        async for chunk in r.aiter_bytes():
+                            f.write(chunk)
+                return r
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class AsyncJurisdiction(BaseJurisdiction):
+
+    """
+    A Clarity results jurisdiction whose requests are coroutines, sent with
+    an ``AsyncClient``.
+
+    It offers the discovery and report methods of ``Jurisdiction`` as
+    coroutines, but not its cache, ``Transport`` or bulk downloads.  The
+    summary URL isn't looked up lazily: ``summary_url`` is ``UNRESOLVED``
+    until ``get_summary_url`` has been awaited.
+
+    Constructing an ``AsyncJurisdiction`` makes no requests.  Jurisdictions
+    that share an ``AsyncClient`` share its connection pool and concurrency
+    limit, so many jurisdictions can be polled concurrently from one event
+    loop::
+
+        async with AsyncClient(max_concurrency=20) as client:
+            jurisdictions = [AsyncJurisdiction(url, 'county', client=client) for url in urls]
+            versions = await asyncio.gather(*(j.get_current_ver() for j in jurisdictions))
+    """
+
+    def __init__(self, url, level, name='', client=None):
+        """
+        Args:
+            url: Clarity results URL for the jurisdiction.
+            level: Level of the jurisdiction, as for ``Jurisdiction``.
+            name: Name of the jurisdiction.
+            client: ``AsyncClient`` to send requests with.  By default a new
+                client is created.
+        """
+        super(AsyncJurisdiction, self).__init__(url, level, name)
+        self.client = client if client is not None else AsyncClient()
+        self.summary_url = UNRESOLVED
+        self.current_ver = self.parsed_url.get('version')
+
+    async def get_current_ver(self):
+        """
+        Fetch the current version of the election's results.
+
+        If the jurisdiction's URL didn't include a version, the version is
+        also stored in ``current_ver`` and used to build report URLs.
+
+        Returns:
+            String containing the current version, or None if it could not
+            be found.
+        """
+        url = self.construct_url(self.parsed_url, 'current_ver.txt', include_version=False)
+        r = await self.client.get(url)
+        if r.status_code != 200:
+            return None
+        if 'version' not in self.parsed_url:
+            self.current_ver = self.parsed_url['version'] = r.text
+        return r.text
+
+    async def get_latest_summary_url(self):
+        """
+        Returns the URL of the latest summary page for the election, or None
+        if it could not be found.
+        """
+        current_ver = await self.get_current_ver()
+        if current_ver is None:
+            return None
+        parsed_url = dict(self.parsed_url, version=current_ver)
+
+        for path in LATEST_SUMMARY_PATHS:
+            url = self.construct_url(parsed_url, path)
+            r = await self.client.get(url)
+            if r.status_code == 200:
+                return url
+        return None
+
+    async def get_summary_url(self):
+        """
+        Returns the summary report URL for the jurisdiction, or None if
+        there is no summary report.  The URL is also stored in
+        ``summary_url``, and only looked up once.
+        """
+        if self.summary_url is UNRESOLVED:
+            url = self.construct_url(self.parsed_url, "reports/summary.zip")
+            result = await self.client.probe(url)
+            self.summary_url = url if result.exists else None
+        return self.summary_url
+
+    def _get_report_url(self, fmt):
+        """
+        Return the url for the report in a given format without checking to
+        see if it is valid.  The URL only includes a version once one is
+        known, from the jurisdiction's URL or ``get_current_ver``.
+        """
+        return self._construct_report_url(self.parsed_url, fmt)
+
+    async def report_url(self, fmt):
+        """
+        Returns link to detailed report depending on format. Formats are xls, txt and xml.
+        """
+        result = await self.probe_report(fmt)
+        return result.url if result.exists else None
+
+    async def probe_report(self, fmt):
+        """
+        Checks whether the detailed report in a given format exists without
+        downloading it.
+
+        Returns:
+            A ``ProbeResult`` with the report's URL, size and modification
+            time.
+        """
+        return await self.client.probe(self._get_report_url(fmt))
+
+    async def download_report(self, fmt, output_fn):
+        """
+        Downloads the selected report and saves it with the given output filename.
+
+        Returns:
+            True if the report was downloaded, otherwise False.
+        """
+        r = await self.client.download(self._get_report_url(fmt), output_fn)
+        return r.status_code == 200
+
+    async def get_subjurisdictions(self):
+        """
+        Returns a list of ``AsyncJurisdiction`` objects for the
+        subjurisdictions of this jurisdiction, sharing its client.
+        """
+        subjurisdictions_url = self._get_subjurisdictions_url(self.parsed_url)
+        if 'Web02' in self.url or 'web.' in self.url:
+            summary_url = await self.get_latest_summary_url()
+            if summary_url is None:
+                return []
+            json_urls = [summary_url.replace('summary.json', 'electionsettings.json')]
+        elif not subjurisdictions_url:
+            json_urls = [
+                self.url.replace('summary.html', 'json/electionsettings.json'),
+                self.url.replace('summary.html', 'json/en/electionsettings.json'),
+            ]
+        else:
+            return await self._scrape_subjurisdictions(subjurisdictions_url)
+
+        for json_url in self._order_settings_urls(json_urls):
+            r = await self.client.get(json_url)
+            if r.status_code == 200:
+                self._remember_settings_url(json_urls, json_url)
+                counties = r.json()['settings']['electiondetails']['participatingcounties']
+                return self._get_subjurisdictions_urls_from_json(counties)
+        return []
+
+    async def _scrape_subjurisdictions(self, subjurisdictions_url):
+        """
+        Find subjurisdictions from the county list page, following each
+        county's redirect page concurrently.
+        """
+        r = await self.client.get(subjurisdictions_url)
+        if r.status_code != 200:
+            return []
+
+        paths = self._scrape_subjurisdiction_paths(r.text)
+        responses = await asyncio.gather(*[
+            self.client.get(self._subjurisdiction_index_url(path))
+            for path, name in paths
+        ])
+        return [
+            self._make_subjurisdiction(self._subjurisdiction_summary_url(str(res.url), res.text), name)
+            for (path, name), res in zip(paths, responses)
+        ]
+
+    def _make_subjurisdiction(self, url, name):
+        return AsyncJurisdiction(url, 'county', name, client=self.client)
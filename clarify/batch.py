@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor
+import io
+import zipfile
+
+from .parser import ChainedResultView, Parser
+
+
+def parse_many(sources, workers=None, **kwargs):
+    """
+    Parse many detail XML reports in parallel
+
+    Each report is parsed by a columnar ``Parser`` in a separate process,
+    and the parsers are sent back in the store's compact pickled form.
+
+    Args:
+        sources: Iterable of filenames, or bytes, of zipped or unzipped
+            detail XML reports
+        workers: Maximum number of worker processes.  Defaults to the number
+            of CPUs.  If 1, the reports are parsed in this process.
+        **kwargs: Additional arguments passed to ``Parser.parse``
+
+    Returns:
+        A ``ParsedReports`` object with one parser per source, in the same
+        order as ``sources``.
+
+    Raises:
+        ``ValueError`` if two of the reports have the same region.
+
+    """
+    sources = list(sources)
+    if workers == 1:
+        parsers = [_parse_source(source, kwargs) for source in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsers = list(executor.map(_parse_source, sources, [kwargs] * len(sources)))
+    return ParsedReports(parsers)
+
+
+def _parse_source(source, kwargs):
+    """
+    Parse a single zipped or unzipped report with a columnar ``Parser``
+    """
+    parser = Parser(columnar=True)
+    f = io.BytesIO(source) if isinstance(source, bytes) else source
+    if zipfile.is_zipfile(f):
+        parser.parse_zip(f, **kwargs)
+    else:
+        if isinstance(f, io.BytesIO):
+            f.seek(0)
+        parser.parse(f, **kwargs)
+    return parser
+
+
+class ParsedReports(object):
+    """
+    The combined results of several parsed detail XML reports
+
+    This is typically every county's report for a state.  The results of all
+    of the reports can be accessed as one statewide set of results, read
+    from each report's columnar store in turn rather than copied.  Contests
+    and result jurisdictions aren't merged across reports, even if they have
+    the same name, as precinct names are often only unique within a county.
+
+    Args:
+        parsers: Columnar ``Parser`` objects, one per report
+
+    Raises:
+        ``ValueError`` if two of the reports have the same region, as
+        ``get_parser`` couldn't tell them apart.
+
+    """
+    def __init__(self, parsers):
+        self.parsers = parsers
+        self._parser_lookup = {}
+        for p in parsers:
+            if p.region in self._parser_lookup:
+                raise ValueError("More than one report has the region {!r}".format(p.region))
+            self._parser_lookup[p.region] = p
+
+    @property
+    def contests(self):
+        """``Contest`` objects from all of the reports"""
+        return [c for p in self.parsers for c in p.contests]
+
+    @property
+    def result_jurisdictions(self):
+        """``ResultJurisdiction`` objects from all of the reports"""
+        return [j for p in self.parsers for j in p.result_jurisdictions]
+
+    @property
+    def results(self):
+        """``ChainedResultView`` of the results from all of the reports"""
+        return ChainedResultView(p.results for p in self.parsers)
+
+    def get_parser(self, region):
+        """
+        Get the parser for a single report by its region.
+
+        Args:
+            region (str): The ``Region`` of the report, usually the name of
+                a county.
+
+        Returns:
+            ``Parser`` object for the report.
+
+        Raises:
+            ``KeyError`` if there is no report for the region.
+
+        """
+        return self._parser_lookup[region]
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .transport import UA_HEADER, get_default_transport
+
+# Response headers kept with cached responses
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class HTTPCache(object):
+
+    """
+    An on-disk cache of HTTP GET responses.
+
+    Cached responses are revalidated with ``If-None-Match`` and
+    ``If-Modified-Since`` requests, so a resource that hasn't changed costs
+    a 304 response instead of a download.  Resources at URLs that include
+    the results version, such as report archives, never change and are
+    served from the cache without a request.
+
+    Each cached URL is stored as two files in the cache directory, named
+    by a hash of the URL: the response body and a JSON file of metadata.
+    """
+
+    def __init__(self, directory, session=None):
+        """
+        Args:
+            directory: Path of the directory to store responses in.  It is
+                created if it doesn't exist.
+            session: ``Transport`` or ``requests.Session`` to send
+                requests with.  Defaults to ``get_default_transport()``.
+        """
+        self.directory = directory
+        self.session = session if session is not None else get_default_transport()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, url, immutable=False, session=None):
+        """
+        Fetch a URL, using the cached response if it is still valid.
+
+        Args:
+            url: URL to fetch.
+            immutable: If True, the resource at the URL never changes, so a
+                cached response is returned without revalidating it.
+            session: ``Transport`` or ``requests.Session`` to send the
+                request with, instead of the cache's session.
+
+        Returns:
+            A ``requests.Response``.  Responses served from the cache have
+            status 200 and a ``from_cache`` attribute of True.
+
+        """
+        metadata = self._load_metadata(url)
+        if metadata is not None and immutable:
+            return self._cached_response(url, metadata)
+
+        headers = dict(UA_HEADER)
+        if metadata is not None:
+            headers.update(self._conditional_headers(metadata))
+
+        session = session if session is not None else self.session
+        r = session.get(url, headers=headers)
+        if r.status_code == 304 and metadata is not None:
+            return self._cached_response(url, metadata)
+        r.from_cache = False
+        if r.status_code == 200:
+            self._store(url, r)
+        return r
+
+    def get_path(self, url):
+        """
+        Returns the path of the cached body for a URL, or None if the URL
+        isn't cached.
+        """
+        if self._load_metadata(url) is None:
+            return None
+        return self._paths(url)[1]
+
+    def clear(self):
+        """
+        Remove all cached responses.
+        """
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+
+    def _paths(self, url):
+        """
+        Returns the paths of the metadata and body files for a URL.
+        """
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def _load_metadata(self, url):
+        metadata_path, body_path = self._paths(url)
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except (IOError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        return metadata
+
+    @classmethod
+    def _conditional_headers(cls, metadata):
+        headers = {}
+        cached_headers = metadata['headers']
+        if 'ETag' in cached_headers:
+            headers['If-None-Match'] = cached_headers['ETag']
+        if 'Last-Modified' in cached_headers:
+            headers['If-Modified-Since'] = cached_headers['Last-Modified']
+        return headers
+
+    def get_conditional_headers(self, url):
+        """
+        Returns the headers for a conditional request that revalidates the
+        cached response for a URL, which are empty if the URL isn't cached.
+        """
+        metadata = self._load_metadata(url)
+        if metadata is None:
+            return {}
+        return self._conditional_headers(metadata)
+
+    def store_file(self, url, path, headers=None):
+        """
+        Add a downloaded file to the cache, copying it rather than reading
+        it into memory.
+
+        Args:
+            url: URL the file was downloaded from.
+            path: Path of the downloaded file.
+            headers: Headers of the response, whose ``ETag`` and
+                ``Last-Modified`` headers are kept to revalidate the file.
+                Files from immutable URLs don't need them.
+        """
+        metadata_path, body_path = self._paths(url)
+        tmp_path = self._get_tmp_path()
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, body_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        metadata = {'url': url, 'encoding': None, 'headers': self._get_cached_headers(headers or {})}
+        self._write_atomic(metadata_path, json.dumps(metadata), 'w')
+
+    @classmethod
+    def _get_cached_headers(cls, headers):
+        return {name: headers[name] for name in CACHED_HEADERS if name in headers}
+
+    def _store(self, url, response):
+        metadata_path, body_path = self._paths(url)
+        metadata = {
+            # The URL after any redirects
+            'url': response.url,
+            'encoding': response.encoding,
+            'headers': self._get_cached_headers(response.headers),
+        }
+        # Write the body before the metadata, replacing each atomically, so
+        # that a concurrent reader never sees metadata for a partial body
+        self._write_atomic(body_path, response.content, 'wb')
+        self._write_atomic(metadata_path, json.dumps(metadata), 'w')
+
+    def _get_tmp_path(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        return tmp_path
+
+    def _write_atomic(self, path, data, mode):
+        tmp_path = self._get_tmp_path()
+        try:
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _cached_response(self, url, metadata):
+        with open(self._paths(url)[1], 'rb') as f:
+            content = f.read()
+        r = requests.Response()
+        r.status_code = 200
+        r.url = metadata['url']
+        r.encoding = metadata['encoding']
+        r.headers = CaseInsensitiveDict(metadata['headers'])
+        r._content = content
+        r.from_cache = True
+        return r
+
+
+class TTLCache(object):
+
+    """
+    A thread-safe in-memory mapping whose entries expire ``ttl`` seconds
+    after they're set.  Changing ``ttl`` applies to existing entries.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            set_time, value = entry
+            if time.monotonic() - set_time >= self.ttl:
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
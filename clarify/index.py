@@ -0,0 +1,172 @@
+from collections import namedtuple
+import json
+import mmap
+import os
+import re
+
+from lxml import etree
+
+
+# Opening tag of a ``Contest`` element.  Attribute values are matched as
+# quoted strings, as they may contain ``>``.
+CONTEST_START_REGEX = re.compile(rb'<Contest\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+CONTEST_END = b'</Contest>'
+# End of the turnout element, which is the last of the header elements
+TURNOUT_END_REGEX = re.compile(
+    rb'</(?:Election)?VoterTurnout\s*>'
+    rb'|<(?:Election)?VoterTurnout\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*/>')
+INDEX_SUFFIX = '.index.json'
+
+
+class ContestOffset(namedtuple('ContestOffset', 'key text offset length')):
+
+    """
+    Position of a ``Contest`` element in a report file, in bytes
+    """
+
+    __slots__ = ()
+
+
+class ContestIndex(namedtuple('ContestIndex', 'size mtime header_length contests')):
+
+    """
+    Byte offsets of the elements of an uncompressed report file
+
+    ``header_length`` is the number of bytes from the start of the file to
+    the end of the ``VoterTurnout`` (or ``ElectionVoterTurnout``) element.
+    ``size`` and ``mtime`` are the size and modification time, in
+    nanoseconds, of the file that was indexed, and are used to detect when
+    the index is out of date.
+    """
+
+    __slots__ = ()
+
+    def get_contest(self, key):
+        """
+        Get the offset of a contest by its key or text
+
+        Raises:
+            ``KeyError`` if there is no such contest.
+
+        """
+        for contest in self.contests:
+            if key in (contest.key, contest.text):
+                return contest
+        raise KeyError(key)
+
+    def is_current(self, path):
+        """
+        Check whether the index matches the file at ``path``
+        """
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns) == (self.size, self.mtime)
+
+
+def get_index_path(path):
+    """
+    Get the path of the sidecar index file of a report
+    """
+    return path + INDEX_SUFFIX
+
+
+def build_index(path, index_path=None):
+    """
+    Index the ``Contest`` elements of an uncompressed report file
+
+    The file is scanned once, through a memory map, without being parsed as
+    XML.  Only the opening tag of each contest is parsed, to read its key
+    and text.
+
+    Args:
+        path: Filename of the XML report.
+        index_path: Filename of the JSON index to write.  Defaults to the
+            report's filename with ``.index.json`` appended.  If False, the
+            index isn't written.
+
+    Returns:
+        A ``ContestIndex`` object.
+
+    Raises:
+        ``ValueError`` if the report has no turnout element.
+
+    """
+    st = os.stat(path)
+    contests = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        turnout_end = TURNOUT_END_REGEX.search(mm)
+        if turnout_end is None:
+            raise ValueError("No VoterTurnout element was found in {}".format(path))
+
+        pos = turnout_end.end()
+        while True:
+            start = CONTEST_START_REGEX.search(mm, pos)
+            if start is None:
+                break
+            start_tag = start.group()
+            if start_tag.endswith(b'/>'):
+                end = start.end()
+                attrib = etree.fromstring(start_tag).attrib
+            else:
+                end = mm.find(CONTEST_END, start.end())
+                if end == -1:
+                    raise ValueError("Unclosed Contest element at byte {} of {}".format(
+                        start.start(), path))
+                end += len(CONTEST_END)
+                attrib = etree.fromstring(start_tag + CONTEST_END).attrib
+            contests.append(ContestOffset(attrib.get('key'), attrib.get('text'),
+                                          start.start(), end - start.start()))
+            pos = end
+
+    index = ContestIndex(st.st_size, st.st_mtime_ns, turnout_end.end(), contests)
+    if index_path is not False:
+        write_index(index, index_path or get_index_path(path))
+    return index
+
+
+def write_index(index, index_path):
+    """
+    Write a ``ContestIndex`` to a JSON file
+    """
+    data = index._asdict()
+    data['contests'] = [c._asdict() for c in index.contests]
+    tmp_path = '{}.{}.tmp'.format(index_path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, index_path)
+
+
+def read_index(index_path):
+    """
+    Read a ``ContestIndex`` from a JSON file
+    """
+    with open(index_path) as f:
+        data = json.load(f)
+    data['contests'] = [ContestOffset(**c) for c in data['contests']]
+    return ContestIndex(**data)
+
+
+def get_index(path):
+    """
+    Get the index of a report, building it if its sidecar file is missing
+    or out of date
+
+    Args:
+        path: Filename of the XML report.
+
+    Returns:
+        A ``ContestIndex`` object.
+
+    """
+    index_path = get_index_path(path)
+    try:
+        index = read_index(index_path)
+    except (OSError, ValueError, TypeError, KeyError):
+        index = None
+    if index is not None and index.is_current(path):
+        return index
+
+    try:
+        return build_index(path)
+    except PermissionError:
+        # The report's directory isn't writable, so keep the index in memory
+        return build_index(path, index_path=False)
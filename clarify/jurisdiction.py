@@ -1,13 +1,21 @@
+from collections import namedtuple
 import concurrent.futures
-
-from urllib import parse
-
+import os
 import re
+import shutil
+import threading
+import time
+from urllib.parse import urlsplit
+import zipfile
+
 import requests
-from requests_futures.sessions import FuturesSession
 import lxml.html
 from lxml.cssselect import CSSSelector
 
+from .cache import TTLCache
+from .transport import (CLARITY_RESULTS_HOSTNAMES, UA_HEADER, DownloadInterruptedError, DownloadResult, download,
+                        get_default_transport, probe)
+
 # base_uri is the path prefix including the folloing named groups:
 # - state_id (required)
 # - jurisdiction_name (optional) -- the city/county/precinct name, with URL-safe whitespace
@@ -24,28 +32,94 @@ BASE_URL_REGEX = re.compile(
     r'(?P<path>.*)'
     r'$'
 )
-CLARITY_RESULTS_HOSTNAMES = ["results.enr.clarityelections.com", "www.enr-scvotes.org", "electionresults.iowa.gov"]
 SUPPORTED_LEVELS = ['state', 'county', 'city', 'precinct']
-UA_HEADER = {
-    "User-Agent": "Mozilla/5.0 (platform; rv:geckoversion) Gecko/geckotrail Firefox/firefoxversion"
-}
+# Paths, relative to the versioned election URL, where the latest summary
+# page may be found, in the order they are tried
+LATEST_SUMMARY_PATHS = [
+    "json/en/summary.json",
+    "Web01/en/summary.html",
+    "en/summary.html",
+]
+# Seconds to remember election versions and summary page layouts
+DISCOVERY_TTL = 60
+# Placeholder for lazily-resolved attributes that haven't been looked up yet
+UNRESOLVED = object()
 
 
-class Jurisdiction(object):
+class ReportManifestEntry(namedtuple('ReportManifestEntry', 'name version url path size elapsed error')):
 
     """
-    Returns an object representing a state, county or city that has
-    a Clarity election results page, and methods for retrieving
-    additional information about those results.
+    The outcome of downloading one subjurisdiction's report with
+    ``Jurisdiction.download_all_reports``.
+
+    ``path`` and ``size`` are None and ``error`` is the exception raised if
+    the report couldn't be downloaded.  ``elapsed`` is the time spent on the
+    report, including retries, in seconds.
+    """
+
+    __slots__ = ()
+
+
+# Versions and summary page layouts of elections, shared by all
+# jurisdictions
+discovery_cache = TTLCache(DISCOVERY_TTL)
+
+
+def http_get(url, cache=None, immutable=False, transport=None):
+    """
+    GET a URL, through an ``HTTPCache`` if one is given, with a
+    ``Transport``, by default the one returned by ``get_default_transport``.
+
+    Pass ``immutable=True`` for URLs that include a results version.  The
+    files of a version never change, so a cached response for one is used
+    without revalidating it.
+
+    Returns:
+        A ``requests.Response``.
+    """
+    transport = transport if transport is not None else get_default_transport()
+    if cache is not None:
+        return cache.get(url, immutable=immutable, session=transport)
+    return transport.get(url)
+
+
+class BaseJurisdiction(object):
+
+    """
+    URL parsing, validation and scraping shared by ``Jurisdiction`` and
+    ``clarify.async_jurisdiction.AsyncJurisdiction``.
+
+    None of these methods make requests, so they work the same for
+    either client.  Subclasses send the requests, and create their own
+    subjurisdictions with ``_make_subjurisdiction``.
     """
 
     def __init__(self, url, level, name=''):
         """
-        To create an instance, pass a Clarity results URL for the top-level
-        political jurisdiction (a state, for example), and the corresponding
-        level in lowercase ("state", "county", "city", or "precinct").
+        Args:
+            url: Clarity results URL for the jurisdiction.
+            level: Level of the jurisdiction in lowercase ("state",
+                "county", "city", or "precinct").
+            name: Name of the jurisdiction.
+        """
+        self.url = self._validate_url(url)
+        self.parsed_url = self._parse_url(self.url)
+        self.level = self._validate_level(level)
+        self.name = name
+
+    @classmethod
+    def _validate_url(cls, url):
         """
+        Check that a URL is a string-like Clarity results URL
+
+        Returns:
+            The URL as a string.
 
+        Raises:
+            ``TypeError`` if the URL isn't string-like, ``ValueError`` if it
+            isn't on a Clarity results host.
+
+        """
         # Preliminary check for any type which is not string-like
         if url == None:
             raise TypeError('Invalid url parameter')
@@ -64,24 +138,29 @@ class Jurisdiction(object):
         # if url is an HTTP URL to Clarity Election Results
         if len([url for host in CLARITY_RESULTS_HOSTNAMES if(host in url)]) == 0:
             raise ValueError('Unsupported url origin')
-        self.url = url
-        self.parsed_url = self._parse_url(self.url)
+        return url
+
 
+    @classmethod
+    def _validate_level(cls, level):
+        """
+        Check that a jurisdiction level is supported
+
+        Returns:
+            The level in lowercase.
+
+        Raises:
+            ``TypeError`` if the level isn't a string, ``ValueError`` if it
+            isn't one of ``SUPPORTED_LEVELS``.
+
+        """
         if type(level) != str:
             raise TypeError('Invalid level parameter')
         level = level.lower()
         if level not in SUPPORTED_LEVELS:
             raise ValueError('Unsupported level')
-        self.level = level
-        self.name = name
-        self.summary_url = self._get_summary_url()
+        return level
 
-        if 'version' in self.parsed_url:
-            self.current_ver = self.parsed_url['version']
-        else:
-            self.current_ver = self.get_current_ver(url)
-            if self.current_ver:
-                self.parsed_url['version'] = self.current_ver
 
     @classmethod
     def construct_url(cls, parsed_url, path, include_version=True):
@@ -91,117 +170,10 @@ class Jurisdiction(object):
                 url_parts.append(parsed_url[key])
         if include_version and 'version' in parsed_url:
             url_parts.append(parsed_url['version'])
-        url_parts.append(path)
-        return parse.urlunsplit(url_parts)
-
-    @classmethod
-    def get_current_ver(cls, election_url):
-        parsed_url = cls._parse_url(election_url)
-        # possible version filenames
-        possible_filenames = ['current_ver.txt']
-        ret = None
-        for filename in possible_filenames:
-            # if we have already seen a 200-status response
-            if ret is None:
-                current_ver_url = cls.construct_url(parsed_url, filename, include_version=False)
-                current_ver_response = requests.get(current_ver_url, headers=UA_HEADER)
-                try:
-                    current_ver_response.raise_for_status()
-                    ret = current_ver_response.text
-                except requests.exceptions.HTTPError:
-                    ret = None
-        return ret
-
-    @classmethod
-    def get_latest_summary_url(cls, election_url):
-        parsed_url = cls._parse_url(election_url)
-        current_ver = cls.get_current_ver(election_url)
-
-        # If we don't have current_ver, we can't determine a summary URL.
-        if current_ver is None:
-            return None
-        parsed_url['version'] = current_ver
-
-        new_paths = [
-            "json/en/summary.json",
-            "Web01/en/summary.html",
-            "en/summary.html",
-        ]
-
-        for new_path in new_paths:
-            latest_summary_url = cls.construct_url(parsed_url, new_path)
+        # Join the path with a single '/', so that a path of '/' gives a
+        # URL with a trailing slash
+        return '/'.join(url_parts) + '/' + path.lstrip('/')
 
-            latest_summary_url_response = requests.get(latest_summary_url, headers=UA_HEADER)
-
-            try:
-                latest_summary_url_response.raise_for_status()
-            except requests.exceptions.HTTPError:
-                continue
-
-            return latest_summary_url
-
-        # If none of the expected paths succeed, return None.
-        return None
-
-    def get_subjurisdictions(self):
-        """
-        Returns a list of subjurisdictions depending on the level
-        of the main jurisdiction. States always have counties, and
-        counties and cities may have precincts.
-        """
-
-        subjurisdictions_url = self._get_subjurisdictions_url()
-        if 'Web02' in self.url or 'web.' in self.url:
-            json_url = self.get_latest_summary_url(self.url).replace('summary.json', 'electionsettings.json')
-            try:
-                r = requests.get(json_url, headers=UA_HEADER)
-                r.raise_for_status()
-                jurisdictions = []
-                counties = r.json()['settings']['electiondetails']['participatingcounties']
-                jurisdictions = self._get_subjurisdictions_urls_from_json(counties)
-                return jurisdictions
-            except requests.exceptions.HTTPError:
-                return []
-        elif not subjurisdictions_url:
-            json_url = self.url.replace('summary.html', 'json/electionsettings.json')
-            try:
-                r = requests.get(json_url, headers=UA_HEADER)
-                r.raise_for_status()
-                jurisdictions = []
-                counties = r.json()['settings']['electiondetails']['participatingcounties']
-                jurisdictions = self._get_subjurisdictions_urls_from_json(counties)
-                return jurisdictions
-            except requests.exceptions.HTTPError:
-                json_url = self.url.replace('summary.html', 'json/en/electionsettings.json')
-                try:
-                    r = requests.get(json_url, headers=UA_HEADER)
-                    r.raise_for_status()
-                    jurisdictions = []
-                    counties = r.json()['settings']['electiondetails']['participatingcounties']
-                    jurisdictions = self._get_subjurisdictions_urls_from_json(counties)
-                    return jurisdictions
-                except requests.exceptions.HTTPError:
-                    return []
-        try:
-            r = requests.get(subjurisdictions_url, headers=UA_HEADER)
-            r.raise_for_status()
-
-            # Use a maximum of 10 workers.  Should we parameterize this?
-            session = FuturesSession(max_workers=10)
-            future_to_name = {}
-            for url, name in self._scrape_subjurisdiction_paths(r.text):
-                future = self._subjurisdiction_url_future(session, url)
-                future_to_name[future] = name
-
-            jurisdictions = []
-            for future in concurrent.futures.as_completed(future_to_name):
-                url = self._subjurisdiction_url_from_future(future)
-                name = future_to_name[future]
-                jurisdictions.append(Jurisdiction(url, 'county', name))
-
-            return jurisdictions
-        except requests.exceptions.HTTPError:
-            return []
 
     @classmethod
     def _parse_url(cls, url):
@@ -223,20 +195,60 @@ class Jurisdiction(object):
             url_params[k] = v
         return url_params
 
+
+    @classmethod
+    def _is_versioned_url(cls, url):
+        """
+        Returns True if a URL includes a results version, so that what it
+        points to never changes.
+        """
+        return 'version' in cls._parse_url(url)
+
+
+    @classmethod
+    def _order_settings_urls(cls, json_urls):
+        """
+        Returns candidate ``electionsettings.json`` URLs in the order they
+        should be tried, starting with the one that last existed.
+
+        Which of the candidates an election uses is remembered, like its
+        summary page layout, in ``discovery_cache``.
+        """
+        found_url = discovery_cache.get(('settings_url', json_urls[0]))
+        if found_url not in json_urls:
+            return json_urls
+        return [found_url] + [url for url in json_urls if url != found_url]
+
+
+    @classmethod
+    def _remember_settings_url(cls, json_urls, found_url):
+        discovery_cache.set(('settings_url', json_urls[0]), found_url)
+
+
     def _get_subjurisdictions_urls_from_json(self, counties):
+        """
+        Returns subjurisdictions for the ``participatingcounties`` of an
+        election's settings.  Each county's settings include the version of
+        its results, so no requests are needed to build them.
+        """
         subjurisdictions = []
         for c in counties:
             new_info = dict(self.parsed_url)
-            new_info['jurisdiction_name'], new_info['election_id'], new_info['version'], date, fill = c.split('|')
+            new_info['jurisdiction_name'], new_info['election_id'], new_info['version'] = c.split('|')[:3]
             url = self.construct_url(new_info, 'Web01/en/summary.html')
-            subjurisdictions.append(Jurisdiction(url, 'county', new_info['jurisdiction_name']))
+            subjurisdictions.append(self._make_subjurisdiction(url, new_info['jurisdiction_name']))
         return subjurisdictions
 
-    def _get_subjurisdictions_url(self):
+
+    def _get_subjurisdictions_url(self, parsed_url):
         """
         Returns a URL for the county detail page, which lists URLs for
         each of the counties in a state. If original jurisdiction is
         not a state, returns None.
+
+        Args:
+            parsed_url: The jurisdiction's parsed URL, including the
+                version to build the URL for.
         """
         if self.level != 'state':
             return None
@@ -244,7 +256,8 @@ class Jurisdiction(object):
             return None
         else:
             language = self.parsed_url['path'].split('/')[0]
-            return self.construct_url(self.parsed_url, language + '/select-county.html')
+            return self.construct_url(parsed_url, language + '/select-county.html')
+
 
     def _scrape_subjurisdiction_paths(self, html):
         """
@@ -255,7 +268,12 @@ class Jurisdiction(object):
         results = sel(tree)
         return [(match.get('value'), match.get('id')) for match in results]
 
-    def _subjurisdiction_url_future(self, session, path):
+
+    def _subjurisdiction_index_url(self, path):
+        """
+        Returns the URL of the page that redirects to a subjurisdiction's
+        summary page, given a path scraped from the county list.
+        """
         _, subjur_name, election_id, subpath = path.split('/')
         new_info = dict(self.parsed_url)
         new_info['jurisdiction_name'] = subjur_name
@@ -264,18 +282,28 @@ class Jurisdiction(object):
         # While the URL without the trailing forward slash will ultimately
         # resolve to the same place, it causes a redirect which means an
         # extra request.
-        url = self.construct_url(new_info, '/', include_version=False)
-        future = session.get(url)
-        return future
+        return self.construct_url(new_info, '/', include_version=False)
 
-    def _subjurisdiction_url_from_future(self, future):
-        res = future.result()
-        url = res.url
-        redirect_path = self._scrape_subjurisdiction_summary_path(res.text)
+
+    @classmethod
+    def _construct_report_url(cls, parsed_url, fmt):
+        """
+        Returns the URL of the detailed report in a given format.
+        """
+        return cls.construct_url(parsed_url, "reports/detail{}.zip".format(fmt))
+
+    @classmethod
+    def _subjurisdiction_summary_url(cls, url, html):
+        """
+        Returns a subjurisdiction's summary URL given the URL and contents
+        of the page that redirects to it.
+        """
+        redirect_path = cls._scrape_subjurisdiction_summary_path(html)
         # We need to strip the trailing '/' from the URL before adding
         # the additional path
         return url.strip('/') + redirect_path
 
+
     @classmethod
     def _scrape_subjurisdiction_summary_path(cls, html):
         """
@@ -290,39 +318,399 @@ class Jurisdiction(object):
             segment = tree.xpath("//script")[0].values()[0].split('/')[1]
         return '/' + segment + '/en/summary.html'
 
+
+class Jurisdiction(BaseJurisdiction):
+
+    """
+    Returns an object representing a state, county or city that has
+    a Clarity election results page, and methods for retrieving
+    additional information about those results.
+    """
+
+    def __init__(self, url, level, name='', cache=None, transport=None):
+        """
+        To create an instance, pass a Clarity results URL for the top-level
+        political jurisdiction (a state, for example), and the corresponding
+        level in lowercase ("state", "county", "city", or "precinct").
+
+        Pass an ``HTTPCache`` as ``cache`` to revalidate previously fetched
+        pages and reports instead of downloading them again, and a
+        ``Transport`` as ``transport`` to configure the connection pool,
+        worker threads and timeouts used for requests.  Both are shared
+        with subjurisdictions.  Jurisdictions without a ``transport`` share
+        the one returned by ``get_default_transport``.
+        """
+
+        super(Jurisdiction, self).__init__(url, level, name)
+        self.cache = cache
+        self.transport = transport if transport is not None else get_default_transport()
+        # The summary URL and the current version are looked up the first
+        # time they're needed, so that creating a jurisdiction, for
+        # example each county of a state, doesn't make any requests
+        self._summary_url = UNRESOLVED
+        self._current_ver = self.parsed_url.get('version', UNRESOLVED)
+
+    @property
+    def summary_url(self):
+        """
+        The summary report URL for the jurisdiction, or None if there is
+        no summary report.
+        """
+        if self._summary_url is UNRESOLVED:
+            self._summary_url = self._get_summary_url()
+        return self._summary_url
+
+    @summary_url.setter
+    def summary_url(self, value):
+        self._summary_url = value
+
+    @property
+    def current_ver(self):
+        """
+        The current version of the jurisdiction's results, or None if it
+        could not be found.
+        """
+        if self._current_ver is UNRESOLVED:
+            self._current_ver = self.get_current_ver(self.url, cache=self.cache, transport=self.transport)
+        return self._current_ver
+
+    @current_ver.setter
+    def current_ver(self, value):
+        self._current_ver = value
+
+    def _get_versioned_parsed_url(self):
+        """
+        Returns the parsed URL, including the current version if there is
+        one, so that URLs built from it point at the latest results.
+        """
+        if 'version' not in self.parsed_url and self.current_ver:
+            self.parsed_url['version'] = self.current_ver
+        return self.parsed_url
+
+    @classmethod
+    def get_current_ver(cls, election_url, cache=None, transport=None):
+        """
+        Returns the current version of an election's results, or None if it
+        could not be found.
+
+        Versions are remembered for ``discovery_cache.ttl`` seconds, shared
+        by all jurisdictions, so repeated lookups within a polling interval
+        don't make requests.
+        """
+        current_ver_url = cls.construct_url(cls._parse_url(election_url), 'current_ver.txt', include_version=False)
+        current_ver = discovery_cache.get(('current_ver', current_ver_url))
+        if current_ver is None:
+            current_ver = cls._fetch_current_ver(election_url, cache=cache, transport=transport)
+        return current_ver
+
+    @classmethod
+    def _fetch_current_ver(cls, election_url, cache=None, transport=None):
+        """
+        Requests the current version of an election's results, ignoring and
+        updating the remembered version.
+        """
+        parsed_url = cls._parse_url(election_url)
+        # possible version filenames
+        possible_filenames = ['current_ver.txt']
+        ret = None
+        for filename in possible_filenames:
+            # if we have already seen a 200-status response
+            if ret is None:
+                current_ver_url = cls.construct_url(parsed_url, filename, include_version=False)
+                current_ver_response = http_get(current_ver_url, cache=cache, transport=transport)
+                try:
+                    current_ver_response.raise_for_status()
+                    ret = current_ver_response.text
+                except requests.exceptions.HTTPError:
+                    ret = None
+                else:
+                    discovery_cache.set(('current_ver', current_ver_url), ret)
+        return ret
+
+    @classmethod
+    def get_latest_summary_url(cls, election_url, cache=None, transport=None):
+        """
+        Returns the URL of the summary page for the current version of an
+        election's results, or None if it could not be found.
+
+        Which of ``LATEST_SUMMARY_PATHS`` an election uses is remembered
+        with the current version, in ``discovery_cache``.
+        """
+        parsed_url = cls._parse_url(election_url)
+        current_ver = cls.get_current_ver(election_url, cache=cache, transport=transport)
+
+        # If we don't have current_ver, we can't determine a summary URL.
+        if current_ver is None:
+            return None
+        parsed_url['version'] = current_ver
+
+        summary_path_key = ('summary_path', cls.construct_url(parsed_url, '', include_version=False))
+        summary_path = discovery_cache.get(summary_path_key)
+        if summary_path is not None:
+            return cls.construct_url(parsed_url, summary_path)
+
+        for new_path in LATEST_SUMMARY_PATHS:
+            latest_summary_url = cls.construct_url(parsed_url, new_path)
+
+            latest_summary_url_response = http_get(latest_summary_url, cache=cache, immutable=True,
+                                                   transport=transport)
+
+            try:
+                latest_summary_url_response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                continue
+
+            discovery_cache.set(summary_path_key, new_path)
+            return latest_summary_url
+
+        # If none of the expected paths succeed, return None.
+        return None
+
+    def get_subjurisdictions(self):
+        """
+        Returns a list of subjurisdictions depending on the level
+        of the main jurisdiction. States always have counties, and
+        counties and cities may have precincts.
+        """
+
+        subjurisdictions_url = self._get_subjurisdictions_url(self._get_versioned_parsed_url())
+        if 'Web02' in self.url or 'web.' in self.url:
+            summary_url = self.get_latest_summary_url(self.url, cache=self.cache, transport=self.transport)
+            if summary_url is None:
+                return []
+            return self._get_subjurisdictions_from_settings([
+                summary_url.replace('summary.json', 'electionsettings.json'),
+            ])
+        elif not subjurisdictions_url:
+            return self._get_subjurisdictions_from_settings([
+                self.url.replace('summary.html', 'json/electionsettings.json'),
+                self.url.replace('summary.html', 'json/en/electionsettings.json'),
+            ])
+        try:
+            r = http_get(subjurisdictions_url, cache=self.cache,
+                         immutable=self._is_versioned_url(subjurisdictions_url), transport=self.transport)
+            r.raise_for_status()
+
+            future_to_name = {}
+            for url, name in self._scrape_subjurisdiction_paths(r.text):
+                future = self._subjurisdiction_url_future(url)
+                future_to_name[future] = name
+
+            jurisdictions = []
+            for future in concurrent.futures.as_completed(future_to_name):
+                url = self._subjurisdiction_url_from_future(future)
+                name = future_to_name[future]
+                jurisdictions.append(self._make_subjurisdiction(url, name))
+
+            return jurisdictions
+        except requests.exceptions.HTTPError:
+            return []
+
+    def _get_subjurisdictions_from_settings(self, json_urls):
+        """
+        Returns the subjurisdictions listed in the first of several
+        candidate ``electionsettings.json`` URLs that exists.
+        """
+        for json_url in self._order_settings_urls(json_urls):
+            r = http_get(json_url, cache=self.cache, immutable=self._is_versioned_url(json_url),
+                         transport=self.transport)
+            if r.status_code == 200:
+                self._remember_settings_url(json_urls, json_url)
+                counties = r.json()['settings']['electiondetails']['participatingcounties']
+                return self._get_subjurisdictions_urls_from_json(counties)
+        return []
+
+    def _make_subjurisdiction(self, url, name):
+        """
+        Returns a county-level jurisdiction object for a subjurisdiction
+        of this jurisdiction.
+        """
+        return Jurisdiction(url, 'county', name, cache=self.cache, transport=self.transport)
+
+    def _subjurisdiction_url_future(self, path):
+        url = self._subjurisdiction_index_url(path)
+        return self.transport.submit(http_get, url, cache=self.cache, transport=self.transport)
+
+    def _subjurisdiction_url_from_future(self, future):
+        res = future.result()
+        return self._subjurisdiction_summary_url(res.url, res.text)
+
     def _get_report_url(self, fmt):
         """
         Return the url for the report in a given format without checking to see if it is valid.
         """
-        return self.construct_url(self.parsed_url, "reports/detail{}.zip".format(fmt))
+        return self._construct_report_url(self._get_versioned_parsed_url(), fmt)
 
     def report_url(self, fmt):
         """
         Returns link to detailed report depending on format. Formats are xls, txt and xml.
         """
-        url = self._get_report_url(fmt)
-        r = requests.get(url, headers=UA_HEADER)
-        if r.status_code == 200:
-            return url
+        result = self.probe_report(fmt)
+        if result.exists:
+            return result.url
         else:
             return None
 
+    def probe_report(self, fmt):
+        """
+        Checks whether the detailed report in a given format exists without
+        downloading it.
+
+        Returns:
+            A ``ProbeResult`` with the report's URL, size and modification
+            time.
+        """
+        return probe(self._get_report_url(fmt), session=self.transport)
+
     def download_report(self, fmt, output_fn):
         """
         Downloads the selected report and saves it with the given output filename.
+
+        The report is streamed to disk and only saved as ``output_fn`` once
+        it is complete and is a valid zip file.  If a download is
+        interrupted, calling this again resumes it.
+
+        Returns:
+            A ``DownloadResult`` with the size of the report and the
+            download rate.
+
+        Raises:
+            ``requests.HTTPError`` if the report couldn't be downloaded, or
+            ``zipfile.BadZipFile`` if the download isn't a valid zip file.
+
         """
+        return self._download_report(fmt, output_fn)
+
+    def _download_report(self, fmt, output_fn):
         url = self._get_report_url(fmt)
-        r = requests.get(url, headers=UA_HEADER)
-        with open(output_fn, 'wb') as f:
-            f.write(r.content)
+        if self.cache is None:
+            return download(url, output_fn, session=self.transport, verify_zip=True)
+        if not self._is_versioned_url(url):
+            # Without a version, the report at the URL changes with each
+            # new version of the results
+            return self._revalidate_report(url, output_fn)
+
+        # The report for a version never changes, so a cached copy of it is
+        # always current
+        cached_path = self.cache.get_path(url)
+        if cached_path is not None:
+            shutil.copyfile(cached_path, output_fn)
+            return DownloadResult(url, output_fn, os.path.getsize(output_fn), 0, 0, False, {})
+
+        result = download(url, output_fn, session=self.transport, verify_zip=True)
+        self.cache.store_file(url, output_fn)
+        return result
+
+    def _revalidate_report(self, url, output_fn):
+        """
+        Downloads a report whose URL has no version through the cache, with
+        a conditional request, so an unchanged report isn't downloaded
+        again.
+        """
+        start = time.time()
+        cached_path = self.cache.get_path(url)
+        headers = self.cache.get_conditional_headers(url) if cached_path is not None else None
+        result = download(url, output_fn, session=self.transport, verify_zip=True, headers=headers)
+        if result is None:
+            shutil.copyfile(cached_path, output_fn)
+            return DownloadResult(url, output_fn, os.path.getsize(output_fn), 0, time.time() - start,
+                                  False, {})
+
+        self.cache.store_file(url, output_fn, headers=result.headers)
+        return result
+
+    def download_all_reports(self, fmt, dest_dir, max_workers=None, max_per_host=4):
+        """
+        Downloads the selected report for every subjurisdiction concurrently.
+
+        Reports are saved in ``dest_dir`` as ``<name>_detail<fmt>.zip``.
+        Downloads that are interrupted or corrupted are retried, resuming
+        where they stopped, with the retries and backoff of the
+        jurisdiction's ``TransportPolicy``.  A report that still can't be
+        downloaded is recorded in the manifest with its error rather than
+        stopping the other downloads.
+
+        Args:
+            fmt: Report format, as for ``download_report``.
+            dest_dir: Directory to save reports in.  It is created if it
+                doesn't exist.
+            max_workers: Maximum number of reports downloaded at once.  By
+                default, reports are downloaded on the jurisdiction's
+                ``Transport`` executor.
+            max_per_host: Maximum number of reports downloaded at once from
+                the same host.
+
+        Returns:
+            A list of ``ReportManifestEntry`` objects, one for each
+            subjurisdiction, in the order of ``get_subjurisdictions``.
+
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        subjurisdictions = self.get_subjurisdictions()
+        host_limits = {
+            urlsplit(j.url).hostname: threading.BoundedSemaphore(max_per_host)
+            for j in subjurisdictions
+        }
+
+        def download_subjurisdiction_report(jurisdiction):
+            output_fn = os.path.join(dest_dir, '{}_detail{}.zip'.format(jurisdiction.name, fmt))
+            with host_limits[urlsplit(jurisdiction.url).hostname]:
+                return jurisdiction._download_report_with_retries(fmt, output_fn)
+
+        # Subjurisdictions share this jurisdiction's transport, so all the
+        # downloads share one pool of connections
+        if max_workers is None:
+            return list(self.transport.executor.map(download_subjurisdiction_report, subjurisdictions))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(download_subjurisdiction_report, subjurisdictions))
+
+    def _download_report_with_retries(self, fmt, output_fn):
+        """
+        Downloads a report, retrying interrupted downloads, and returns a
+        ``ReportManifestEntry``.
+        """
+        policy = self.transport.policy
+        start = time.time()
+        error = None
+        result = None
+        for attempt in range(policy.retries + 1):
+            if attempt:
+                time.sleep(policy.get_backoff(attempt))
+            try:
+                result = self._download_report(fmt, output_fn)
+                error = None
+                break
+            except (requests.exceptions.RequestException, zipfile.BadZipFile) as e:
+                error = e
+                if not self._is_retryable_error(e):
+                    break
+
+        return ReportManifestEntry(
+            name=self.name,
+            version=self.current_ver,
+            url=self._get_report_url(fmt),
+            path=output_fn if result is not None else None,
+            size=result.size if result is not None else None,
+            elapsed=time.time() - start,
+            error=error,
+        )
+
+    @classmethod
+    def _is_retryable_error(cls, error):
+        """
+        Returns True if a download error may succeed if retried.  Only
+        downloads that failed part way through, or produced a corrupt file,
+        are retried.  Connection errors, timeouts and transient error
+        responses have already been retried by the transport.
+        """
+        return isinstance(error, (DownloadInterruptedError, zipfile.BadZipFile))
 
     def _get_summary_url(self):
         """
         Returns the summary report URL for a jurisdiction.
         """
-        url = self.construct_url(self.parsed_url, "reports/summary.zip")
-        r = requests.get(url, headers=UA_HEADER)
-        if r.status_code == 200:
+        url = self.construct_url(self._get_versioned_parsed_url(), "reports/summary.zip")
+        if probe(url, session=self.transport).exists:
             return url
         else:
             return None
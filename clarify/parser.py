@@ -1,11 +1,20 @@
+from array import array
+import bisect
 from collections import namedtuple
 import datetime
+import hashlib
+import io
+import itertools
+import mmap
 import re
+import sys
 
 import dateutil.parser
 from lxml import etree
 import zipfile
 
+from .index import get_index
+
 
 class Parser(object):
 
@@ -16,7 +25,25 @@ class Parser(object):
     http://results.enr.clarityelections.com/KY/Adair/15263/27401/reports/detailxml.zip
     """
 
-    def __init__(self):
+    def __init__(self, columnar=False, track_changes=False):
+        """
+        Args:
+            columnar: If True, store results in a compact ``ResultStore``
+                rather than as individual ``Result`` objects.  ``Result``
+                objects are then only built when they are accessed through
+                the ``results`` attributes of the parser, contests, choices
+                and result jurisdictions.
+            track_changes: If True, ``parse`` and ``load_contest`` hash each
+                ``Contest`` element, so that a later call to ``update`` can
+                reuse the contests that haven't changed.  Otherwise, only
+                ``update`` hashes contests, and the first ``update`` after a
+                ``parse`` rebuilds every contest.  Hashing reads every
+                element of a contest, so it makes parsing slower.
+
+        """
+        self.columnar = columnar
+        self.track_changes = track_changes
+        self._store = ResultStore() if columnar else None
         self.timestamp = None
         self.election_name = None
         self.election_date = None
@@ -25,22 +52,111 @@ class Parser(object):
         self.ballots_cast = None
         self._result_jurisdictions = []
         self._result_jurisdiction_lookup = {}
+        self._result_jurisdiction_ids = {}
         self._contests = []
         self._contest_lookup = {}
+        self._contest_hashes = {}
+        self.detail_level = 'full'
+        self.contests_filter = None
 
-    def parse(self, f):
+    def parse(self, f, stream=False, contests=None, detail_level='full'):
         """
         Parse the report XML file, populating attributes
 
         Args:
-            f: String containing filename or file-like object for the XML
-               report file to be parsed.
+            f: String containing filename, string or bytes containing XML,
+               or file-like object for the XML report file to be parsed.
+            stream: If True, read the document incrementally rather than
+               building the whole tree first.  Each ``Contest`` element is
+               discarded once it has been parsed, so peak memory is bounded
+               by the largest contest rather than the whole report.  The
+               resulting objects are the same in either mode.
+            contests: Optional filter limiting which contests are parsed.
+               Either an iterable of strings, matched against each
+               contest's ``key`` and ``text``, or a function that's passed
+               the attributes of each ``Contest`` element, as a dictionary,
+               and returns True for contests that should be parsed.  The
+               filter is checked before any of a contest's choices or
+               results are read, and contests that don't match are
+               skipped entirely.  Later calls to ``update`` use the same
+               filter.
+            detail_level: ``'full'`` to parse every result, or ``'totals'``
+               to only parse the contest- and choice-level totals of each
+               vote type.  With ``'totals'``, the per-precinct or per-county
+               results are ignored, so only results with a ``jurisdiction``
+               of None are created.  Later calls to ``update`` use the same
+               detail level.
+
+        Raises:
+            ``ValueError`` if ``detail_level`` isn't one of
+            ``DETAIL_LEVELS``.
 
         """
-        if f[0] == '<':
-            tree = etree.fromstring(f)
+        if detail_level not in DETAIL_LEVELS:
+            raise ValueError("detail_level must be one of {}, not {!r}".format(
+                ', '.join(DETAIL_LEVELS), detail_level))
+        self.detail_level = detail_level
+        self.contests_filter = contests
+        self._contest_hashes = {}
+
+        if self.columnar:
+            self._store = ResultStore()
+
+        contest_filter = self._get_contest_filter(contests)
+        if stream:
+            self._parse_stream(f, contest_filter)
         else:
-            tree = etree.parse(f)
+            if self._is_xml_string(f):
+                tree = etree.fromstring(f)
+            else:
+                tree = etree.parse(f)
+            self._parse_header(tree)
+            self._parse_header_jurisdictions(tree)
+            self._contests = self._parse_contests(tree, contest_filter)
+            self._contest_lookup = {c.text: c for c in self._contests}
+
+        if self.columnar:
+            self._link_store()
+
+    def _link_store(self):
+        """
+        Point each result jurisdiction's results at the parser's store
+        """
+        for jurisdiction in self._result_jurisdictions:
+            jurisdiction._results = self._store.jurisdiction_view(jurisdiction)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.columnar:
+            # The store holds every contest and result jurisdiction and can
+            # pickle them far more compactly than the object graph
+            for attr in ('_contests', '_contest_lookup', '_result_jurisdictions',
+                         '_result_jurisdiction_lookup', '_result_jurisdiction_ids'):
+                del state[attr]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.columnar:
+            self._contests = list(self._store.contests)
+            self._contest_lookup = {c.text: c for c in self._contests}
+            self._result_jurisdictions = []
+            self._result_jurisdiction_lookup = {}
+            self._result_jurisdiction_ids = {}
+            for jurisdiction in self._store.jurisdictions:
+                self.add_result_jurisdiction(jurisdiction)
+            self._link_store()
+
+    def _parse_header(self, tree):
+        """
+        Parse the election metadata
+
+        Args:
+            tree: ElementTree object representing the root of the parsed XML
+                document.  Only the elements up to and including the
+                ``VoterTurnout`` element need to be present.
+
+        """
         election_voter_turnout = self._parse_election_voter_turnout(tree)
         self.timestamp = self._parse_timestamp(tree)
         self.election_name = self._parse_election_name(tree)
@@ -50,16 +166,521 @@ class Parser(object):
         self.ballots_cast = int(election_voter_turnout[1])
         self.voter_turnout = float(election_voter_turnout[2])
 
-        self._result_jurisdictions = self._parse_result_jurisdictions(tree)
-        self._result_jurisdiction_lookup = {j.name: j for j in self._result_jurisdictions}
-        self._contests = self._parse_contests(tree)
+    def _parse_header_jurisdictions(self, tree):
+        """
+        Parse the result jurisdictions listed in the ``VoterTurnout`` element
+
+        Args:
+            tree: ElementTree object representing the root of the parsed XML
+                document.
+
+        """
+        self._result_jurisdictions = []
+        self._result_jurisdiction_lookup = {}
+        self._result_jurisdiction_ids = {}
+        for jurisdiction in self._parse_result_jurisdictions(tree):
+            self.add_result_jurisdiction(jurisdiction)
+
+    @classmethod
+    def _get_contest_filter(cls, contests):
+        """
+        Build a function that checks whether a contest should be parsed
+
+        Args:
+            contests: The ``contests`` argument of ``parse``.
+
+        Returns:
+            A function that accepts the attributes of a ``Contest`` element
+            and returns True if the contest should be parsed, or None if
+            every contest should be parsed.
+
+        """
+        if contests is None or callable(contests):
+            return contests
+
+        if isinstance(contests, str):
+            contests = [contests]
+        wanted = frozenset(contests)
+
+        def contest_filter(attrib):
+            return attrib.get('key') in wanted or attrib.get('text') in wanted
+
+        return contest_filter
+
+    def _parse_stream(self, f, contest_filter=None):
+        """
+        Incrementally parse the report XML file, populating attributes
+
+        Args:
+            f: String containing filename, XML or file-like object for the
+               XML report file to be parsed.
+            contest_filter: Optional function returned by
+               ``_get_contest_filter``.
+
+        """
+        self._contests = []
+        self._contest_lookup = {}
+        for el in self._iterparse(f, contest_filter):
+            if el.tag == 'Contest':
+                self._record_contest_hash(el)
+                contest = self._parse_contest(el)
+                self._contests.append(contest)
+                self._contest_lookup[contest.text] = contest
+            else:
+                # The header elements precede the turnout element and are
+                # still attached to the partial tree at this point.
+                tree = el.getroottree()
+                self._parse_header(tree)
+                self._parse_header_jurisdictions(tree)
+
+    def update(self, f):
+        """
+        Re-parse a newer version of the report, reusing unchanged contests
+
+        Each ``Contest`` element is hashed and compared, by its key, with the
+        element that was read by the previous call to ``parse``,
+        ``load_contest`` or ``update``.  Only
+        contests whose elements differ are rebuilt, so refreshing a report
+        costs roughly in proportion to what changed since the last version.
+        Unchanged ``Contest`` objects, and their ``Choice`` and ``Result``
+        objects, are kept.  Result jurisdictions whose turnout figures
+        changed are replaced and the results of unchanged contests are moved
+        to the new objects.
+
+        If nothing has been parsed yet, ``update`` parses every contest,
+        like ``parse``.  Contests are parsed with the ``contests`` filter and
+        ``detail_level`` of the last call to ``parse``, and are only reused
+        after a ``parse`` or ``load_contest`` if the parser was created with
+        ``track_changes=True``.
+
+        Args:
+            f: String containing filename, XML or file-like object for the
+               XML report file to be parsed.
+
+        Returns:
+            A ``ContestChanges`` object listing the keys of the contests that
+            were added, changed, removed and left unchanged.
+
+        Raises:
+            ``ValueError`` if the parser is columnar.
+
+        """
+        if self.columnar:
+            raise ValueError("Columnar parsers don't support incremental updates")
+
+        old_contests = {c.key: c for c in self._contests}
+        old_hashes = self._contest_hashes
+        self._contest_hashes = {}
+        self._contests = []
+        changes = ContestChanges([], [], [], [])
+        replaced_jurisdictions = {}
+        stale_contests = []
+
+        for el in self._iterparse(f, self._get_contest_filter(self.contests_filter)):
+            if el.tag != 'Contest':
+                tree = el.getroottree()
+                self._parse_header(tree)
+                replaced_jurisdictions = self._update_header_jurisdictions(tree)
+                continue
+
+            key = el.attrib.get('key')
+            digest = self._hash_contest(el)
+            self._contest_hashes[key] = digest
+            old_contest = old_contests.pop(key, None)
+            if old_contest is not None and old_hashes.get(key) == digest:
+                self._contests.append(old_contest)
+                changes.unchanged.append(key)
+                continue
+
+            self._contests.append(self._parse_contest(el))
+            if old_contest is None:
+                changes.added.append(key)
+            else:
+                changes.changed.append(key)
+                stale_contests.append(old_contest)
+
+        changes.removed.extend(old_contests)
+        stale_contests.extend(old_contests.values())
         self._contest_lookup = {c.text: c for c in self._contests}
+        self._update_jurisdiction_results(stale_contests, replaced_jurisdictions)
+        return changes
+
+    def _update_header_jurisdictions(self, tree):
+        """
+        Update the result jurisdictions from a newer version of the report
+
+        Jurisdictions whose attributes are unchanged keep their existing
+        objects.  Jurisdictions that only appeared in the results of the
+        previous version are kept too, as unchanged contests may still refer
+        to them.
+
+        Args:
+            tree: ElementTree object representing the root of the parsed XML
+                document.
+
+        Returns:
+            Dictionary mapping the ``id()`` of each replaced
+            ``ResultJurisdiction`` to a tuple of the old and new objects.
+
+        """
+        old_lookup = self._result_jurisdiction_lookup
+        replaced = {}
+        self._result_jurisdictions = []
+        self._result_jurisdiction_lookup = {}
+        self._result_jurisdiction_ids = {}
+        for jurisdiction in self._parse_result_jurisdictions(tree):
+            old = old_lookup.pop(jurisdiction.name, None)
+            if old is not None:
+                if tuple(old) == tuple(jurisdiction):
+                    jurisdiction = old
+                else:
+                    replaced[id(old)] = (old, jurisdiction)
+            self.add_result_jurisdiction(jurisdiction)
+
+        for jurisdiction in old_lookup.values():
+            self.add_result_jurisdiction(jurisdiction)
 
-    def parse_zip(self, zip_path):
-        with zipfile.ZipFile(zip_path, mode='r') as archive:
-            assert archive.namelist() == ['detail.xml']
-            contents = archive.read('detail.xml').decode()
-            self.parse(contents)
+        return replaced
+
+    def _update_jurisdiction_results(self, stale_contests, replaced_jurisdictions):
+        """
+        Bring results in line with the contests and jurisdictions of an update
+
+        Results of rebuilt or removed contests are dropped from the
+        jurisdictions that were kept, and results of unchanged contests are
+        rebuilt for jurisdictions that were replaced.
+
+        Args:
+            stale_contests: List of ``Contest`` objects that were rebuilt or
+                removed
+            replaced_jurisdictions: Dictionary returned by
+                ``_update_header_jurisdictions``
+
+        """
+        stale_ids = {id(c) for c in stale_contests}
+        touched = {}
+
+        for contest in stale_contests:
+            for result in contest.results:
+                if result.jurisdiction is not None:
+                    touched[id(result.jurisdiction)] = result.jurisdiction
+        for jurisdiction in touched.values():
+            jurisdiction._results = [r for r in jurisdiction._results
+                                     if id(r.contest) not in stale_ids]
+
+        # Rebuilding a result adds it to the new jurisdiction's results
+        new_results = {}
+        for old, new in replaced_jurisdictions.values():
+            for result in old.results:
+                if id(result.contest) not in stale_ids:
+                    new_results[id(result)] = Result(result.contest, result.vote_type, new,
+                                                     result.votes, result.choice)
+            touched[id(new)] = new
+
+        if new_results:
+            remapped = {id(r.contest): r.contest for r in new_results.values()}
+            for contest in remapped.values():
+                contest._results = [new_results.get(id(r), r) for r in contest._results]
+                for choice in contest.choices:
+                    choice._results = [new_results.get(id(r), r) for r in choice._results]
+
+        # Keep each jurisdiction's results in contest order, as after a parse
+        positions = {id(c): i for i, c in enumerate(self._contests)}
+        for jurisdiction in touched.values():
+            jurisdiction._results.sort(key=lambda r: positions[id(r.contest)])
+
+    def iter_results(self, f):
+        """
+        Incrementally parse the report XML file, yielding flat result rows
+
+        Unlike ``parse``, no ``Contest``, ``Choice``, ``ResultJurisdiction``
+        or ``Result`` objects are built, so memory use stays constant no
+        matter how large the report is.  The election metadata attributes
+        (``timestamp``, ``region``, etc.) are populated as soon as they have
+        been read.
+
+        Args:
+            f: String containing filename, XML or file-like object for the
+               XML report file to be parsed.
+
+        Yields:
+            ``ResultRow`` tuples, in the same order as ``Parser.results``.
+            Rows for contest- or choice-level totals have a ``jurisdiction``
+            of None, and rows for overvotes and undervotes have a ``choice``
+            and ``party`` of None.
+
+        """
+        for el in self._iterparse(f):
+            if el.tag != 'Contest':
+                self._parse_header(el.getroottree())
+                continue
+
+            contest = el.attrib.get('text')
+            for vt_el in el.iterchildren('VoteType'):
+                for row in self._iter_vote_type_rows(vt_el, contest, None, None):
+                    yield row
+            for c_el in el.iterchildren('Choice'):
+                choice = c_el.attrib['text']
+                party = c_el.attrib.get('party')
+                for vt_el in c_el.iterchildren('VoteType'):
+                    for row in self._iter_vote_type_rows(vt_el, contest, choice, party):
+                        yield row
+
+    @classmethod
+    def _iter_vote_type_rows(cls, vt_el, contest, choice, party):
+        """
+        Yield the ``ResultRow`` tuples for a single ``VoteType`` element
+
+        Args:
+            vt_el: Element object for a ``VoteType`` element
+            contest: Text of the enclosing contest
+            choice: Text of the enclosing choice, or None
+            party: Party of the enclosing choice, or None
+
+        """
+        vote_type = vt_el.attrib['name']
+        yield ResultRow(contest, choice, party, vote_type, None,
+                        cls._parse_votes(vt_el.attrib['votes']))
+        for subjurisdiction_el in vt_el.iterchildren(*SUBJURISDICTION_TAGS):
+            yield ResultRow(contest, choice, party, vote_type,
+                            subjurisdiction_el.attrib['name'],
+                            cls._parse_votes(subjurisdiction_el.attrib['votes']))
+
+    @classmethod
+    def _parse_votes(cls, s):
+        """
+        Convert a vote count to an int, leaving unparseable values as strings
+        """
+        try:
+            return int(s)
+        except ValueError:
+            return s
+
+    @classmethod
+    def _iterparse(cls, f, contest_filter=None):
+        """
+        Incrementally parse a report, yielding its top-level elements
+
+        Args:
+            f: String containing filename, XML or file-like object for the
+               XML report file to be parsed.
+            contest_filter: Optional function that accepts the attributes of
+               a ``Contest`` element and returns True if it should be
+               yielded.  It is called as soon as the element's start tag has
+               been read.
+
+        Yields:
+            The ``VoterTurnout`` (or ``ElectionVoterTurnout``) element and
+            then each ``Contest`` element, once it has been completely read.
+            When iteration resumes, the yielded element and any siblings
+            preceding it are removed from the tree.
+
+        """
+        if cls._is_xml_string(f):
+            if isinstance(f, str):
+                f = f.encode('utf-8')
+            f = io.BytesIO(f)
+
+        events = ('end',) if contest_filter is None else ('start', 'end')
+        skip = False
+        for event, el in etree.iterparse(f, events=events, tag=STREAM_TAGS):
+            if event == 'start':
+                if el.tag == 'Contest':
+                    skip = not contest_filter(el.attrib)
+                continue
+
+            if el.tag != 'Contest' or not skip:
+                yield el
+            el.clear()
+            parent = el.getparent()
+            while el.getprevious() is not None:
+                del parent[0]
+
+    def parse_zip(self, zip_file, **kwargs):
+        """
+        Parse the report XML file inside a zipped detail report
+
+        The XML is read directly out of the archive by lxml, without first
+        being read or decoded into memory.
+
+        Args:
+            zip_file: String containing filename, bytes containing the
+                contents of the zip file, or file-like object for the
+                zipped report.
+            **kwargs: Additional arguments passed to ``parse``.
+
+        Raises:
+            ``ValueError`` if the archive doesn't contain exactly one
+            XML report.
+
+        """
+        if isinstance(zip_file, bytes):
+            zip_file = io.BytesIO(zip_file)
+
+        with zipfile.ZipFile(zip_file, mode='r') as archive:
+            with archive.open(self._get_zip_member(archive)) as f:
+                self.parse(f, **kwargs)
+
+    @classmethod
+    def peek(cls, f):
+        """
+        Read the election metadata from the start of a report, without
+        parsing the rest of it
+
+        Reading stops as soon as the opening tag of the ``VoterTurnout``
+        element has been parsed, so this takes about the same time for
+        any size of report.
+
+        Args:
+            f: String containing filename, string or bytes containing XML,
+               or file-like object for the XML report file.
+
+        Returns:
+            A ``ReportHeader``.
+
+        Raises:
+            ``ValueError`` if the report has no ``VoterTurnout`` or
+            ``ElectionVoterTurnout`` element.
+
+        """
+        if cls._is_xml_string(f):
+            if isinstance(f, str):
+                f = f.encode('utf-8')
+            f = io.BytesIO(f)
+        elif isinstance(f, str):
+            with open(f, 'rb') as fp:
+                return cls.peek(fp)
+
+        for _, el in etree.iterparse(f, events=('start',), tag=TURNOUT_TAGS):
+            # The header elements precede the turnout element, whose
+            # attributes are available once its opening tag has been read
+            parser = cls()
+            parser._parse_header(el.getroottree())
+            return ReportHeader(
+                timestamp=parser.timestamp,
+                election_name=parser.election_name,
+                election_date=parser.election_date,
+                region=parser.region,
+                total_voters=parser.total_voters,
+                ballots_cast=parser.ballots_cast,
+                voter_turnout=parser.voter_turnout,
+            )
+        raise ValueError("No VoterTurnout element found in report")
+
+    @classmethod
+    def peek_zip(cls, zip_file):
+        """
+        Read the election metadata from the start of the report XML file
+        inside a zipped detail report, as ``peek`` does
+
+        Only the start of the compressed report is decompressed.
+
+        Args:
+            zip_file: String containing filename, bytes containing the
+                contents of the zip file, or file-like object for the
+                zipped report.
+
+        Returns:
+            A ``ReportHeader``.
+
+        """
+        if isinstance(zip_file, bytes):
+            zip_file = io.BytesIO(zip_file)
+
+        with zipfile.ZipFile(zip_file, mode='r') as archive:
+            with archive.open(cls._get_zip_member(archive)) as f:
+                return cls.peek(f)
+
+    def load_contest(self, path, key, index=None):
+        """
+        Parse a single contest from an uncompressed report file
+
+        Only the header elements and the contest's own ``Contest`` element
+        are read, from a memory map of the file, so the time taken depends
+        on the size of the contest rather than the size of the report.  The
+        offsets of the elements come from a sidecar index file, with the
+        report's filename and ``.index.json`` appended, which is built on
+        the first call and rebuilt if the report changes.
+
+        The election metadata and result jurisdictions are populated as
+        for ``parse``, and the contest is the parser's only contest.  Later
+        calls to ``update`` only parse this contest, as if it had been
+        selected with the ``contests`` argument of ``parse``.
+
+        Args:
+            path: String containing the filename of the XML report.
+            key: Key or text of the contest.
+            index: Optional ``ContestIndex`` of the report, to use instead of
+                the sidecar index file.
+
+        Returns:
+            The ``Contest`` object.
+
+        Raises:
+            ``KeyError`` if the report has no such contest.
+
+        """
+        if index is None:
+            index = get_index(path)
+        offset = index.get_contest(key)
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            xml = b''.join([
+                mm[:index.header_length],
+                mm[offset.offset:offset.offset + offset.length],
+                b'</ElectionResult>',
+            ])
+
+        if self.columnar:
+            self._store = ResultStore()
+
+        tree = etree.fromstring(xml)
+        self._parse_header(tree)
+        self._parse_header_jurisdictions(tree)
+        contest_el = tree.find('Contest')
+        self.contests_filter = [key]
+        self._contest_hashes = {}
+        self._record_contest_hash(contest_el)
+        contest = self._parse_contest(contest_el)
+        self._contests = [contest]
+        self._contest_lookup = {contest.text: contest}
+
+        if self.columnar:
+            self._link_store()
+        return contest
+
+    @classmethod
+    def _get_zip_member(cls, archive):
+        """
+        Get the name of the XML report within a zipped detail report
+
+        Args:
+            archive: ``ZipFile`` object for the zipped report
+
+        Returns:
+            String containing ``detail.xml`` if the archive contains it,
+            otherwise the name of the only XML file in the archive.
+
+        """
+        names = archive.namelist()
+        if 'detail.xml' in names:
+            return 'detail.xml'
+
+        xml_names = [n for n in names if n.lower().endswith('.xml')]
+        if len(xml_names) != 1:
+            raise ValueError("Expected a single XML report in archive, found {}".format(names))
+        return xml_names[0]
+
+    @classmethod
+    def _is_xml_string(cls, f):
+        """
+        Check whether the argument to ``parse`` is the XML document itself
+        rather than a filename or file-like object
+        """
+        if isinstance(f, str):
+            return f.lstrip().startswith('<')
+        if isinstance(f, bytes):
+            return f.lstrip().startswith(b'<')
+        return False
 
     def _parse_timestamp(self, tree):
         """
@@ -155,12 +776,12 @@ class Parser(object):
         kwargs = {
             'level': el.tag.lower()
         }
-        for f in RESULT_JURISDICTION_FIELDS:
-            if f == 'level':
-                continue
-            attr_name = cls._underscore_to_camel(f)
-            converter = RESULT_JURISDICTION_FIELD_CONVERTERS.get(f)
+        for f, attr_name, converter in RESULT_JURISDICTION_ATTRIBUTES:
             kwargs[f] = cls._get_attrib(el, attr_name, converter)
+        # Jurisdiction names are repeated for every result, so share a
+        # single copy of each
+        if kwargs['name'] is not None:
+            kwargs['name'] = sys.intern(kwargs['name'])
 
         return ResultJurisdiction(**kwargs)
 
@@ -193,6 +814,9 @@ class Parser(object):
 
     @property
     def results(self):
+        if self.columnar:
+            return self._store.view()
+
         results = []
         for c in self.contests:
             results.extend(c.results)
@@ -226,34 +850,48 @@ class Parser(object):
             ``KeyError`` if a matching jurisdiction is not found.
 
         """
-        try:
-            return self._result_jurisdiction_lookup[name]
-        except:
-            # if jurisdiction is in results but not precincts, add it.
-            # mostly used for non-geographical quasi-jurisdictions.
-            new_el = etree.Element('Precinct', {'name': name})
-            parsed_el = self._parse_result_jurisdiction(new_el)
-            self.result_jurisdictions.append(parsed_el)
-            return parsed_el
+        return self._result_jurisdiction_lookup[name]
+
+    def get_result_jurisdiction_id(self, name):
+        """
+        Get the integer id of a ResultJurisdiction by name.
+
+        Ids are assigned in the order jurisdictions are added to the parser
+        and are the jurisdiction's index in ``result_jurisdictions``.
+
+        Args:
+            name (str): Name of the jurisdiction.
+
+        Returns:
+            Integer id of the jurisdiction.
+
+        Raises:
+            ``KeyError`` if a matching jurisdiction is not found.
+
+        """
+        return self._result_jurisdiction_ids[name]
 
     def _get_or_create_result_jurisdiction(self, el):
-        try:
-            return self.get_result_jurisdiction(el.attrib['name'])
-        except KeyError:
+        jurisdiction = self._result_jurisdiction_lookup.get(el.attrib['name'])
+        if jurisdiction is None:
             # We don't yet know about this jurisdiction.  In some rare
             # cases, there is a mismatch between jurisdictions in the
-            # ``VoterTurnout`` element and the ``VoteType`` elements.
+            # ``VoterTurnout`` element and the ``VoteType`` elements.  This
+            # is mostly the case for non-geographical quasi-jurisdictions.
             jurisdiction = self._parse_result_jurisdiction(el)
             self.add_result_jurisdiction(jurisdiction)
-            return jurisdiction
+        return jurisdiction
 
     def add_result_jurisdiction(self, jurisdiction):
         """
         Add a ResultJurisdiction object to the parser's list of known
         Jurisdictions.
         """
+        self._result_jurisdiction_ids[jurisdiction.name] = len(self._result_jurisdictions)
         self._result_jurisdictions.append(jurisdiction)
         self._result_jurisdiction_lookup[jurisdiction.name] = jurisdiction
+        if self.columnar:
+            self._store.add_jurisdiction(jurisdiction)
 
     @classmethod
     def _get_attrib(cls, el, attr, fn=None):
@@ -283,13 +921,16 @@ class Parser(object):
         except KeyError:
             return None
 
-    def _parse_contests(self, tree):
+    def _parse_contests(self, tree, contest_filter=None):
         """
         Parse contests from these results
 
         Args:
             tree: ElementTree object representing the root of the parsed XML
                 document
+            contest_filter: Optional function that accepts the attributes of
+                a ``Contest`` element and returns True if it should be
+                parsed.
 
         Returns:
             List of ``Contest`` objects
@@ -298,8 +939,32 @@ class Parser(object):
         added to the instance's list of result jurisdictions.
 
         """
-        contest_els = tree.xpath('/ElectionResult/Contest')
-        return [self._parse_contest(el) for el in contest_els]
+        contests = []
+        for el in tree.xpath('/ElectionResult/Contest'):
+            if contest_filter is None or contest_filter(el.attrib):
+                self._record_contest_hash(el)
+                contests.append(self._parse_contest(el))
+        return contests
+
+    @classmethod
+    def _hash_contest(cls, contest_el):
+        """
+        Get a digest of a ``Contest`` element, used by ``update`` to find
+        contests that changed
+        """
+        return hashlib.sha1(etree.tostring(contest_el, with_tail=False)).digest()
+
+    def _record_contest_hash(self, contest_el):
+        """
+        Remember the digest of a parsed ``Contest`` element, so that a later
+        call to ``update`` can reuse the contest if it hasn't changed
+
+        Contests are only hashed if the parser tracks changes.  Columnar
+        parsers can't be updated, so they never hash contests.
+
+        """
+        if self.track_changes and not self.columnar:
+            self._contest_hashes[contest_el.attrib.get('key')] = self._hash_contest(contest_el)
 
     def _parse_contest(self, contest_el):
         """
@@ -312,17 +977,19 @@ class Parser(object):
             A ``Contest`` object with attributes parsed from the XML element.
 
         """
-        contest = Contest(
-            key=self._get_attrib(contest_el, 'key'),
-            text=self._get_attrib(contest_el, 'text'),
-            vote_for=self._get_attrib(contest_el, 'voteFor', int),
-            is_question=self._get_attrib(contest_el, 'isQuestion', self._parse_boolean),
-            precincts_reporting=self._get_attrib(contest_el, 'precinctsReporting', int),
-            precincts_reported=self._get_attrib(contest_el, 'precinctsReported', int),
-            precincts_participating=self._get_attrib(contest_el, 'precinctsParticipating', int),
-            counties_reported=self._get_attrib(contest_el, 'countiesReported', int),
-            counties_participating=self._get_attrib(contest_el, 'countiesParticipating', int)
-        )
+        contest = Contest(**{
+            f: self._get_attrib(contest_el, attr_name, converter)
+            for f, attr_name, converter in CONTEST_ATTRIBUTES
+        })
+
+        if self.columnar:
+            self._store.add_contest(contest)
+            # Results for a contest occupy a contiguous range of the store
+            start = len(self._store)
+            self._parse_no_choice_results(contest_el, contest)
+            contest._choices.extend(self._parse_choices(contest_el, contest))
+            contest._results = self._store.view(start, len(self._store))
+            return contest
 
         for r in self._parse_no_choice_results(contest_el, contest):
             contest.add_result(r)
@@ -332,6 +999,22 @@ class Parser(object):
 
         return contest
 
+    def _get_result_factory(self):
+        """
+        Get the callable used to record each result
+
+        Returns:
+            ``Result``, or the ``append`` method of the parser's
+            ``ResultStore`` if the parser is columnar.  Either is called
+            with the contest, vote type, jurisdiction, votes and choice and
+            returns the new ``Result`` object, or None if the result was
+            appended to the store.
+
+        """
+        if self.columnar:
+            return self._store.append
+        return Result
+
     def _parse_no_choice_results(self, contest_el, contest):
         """
         Parse results not associated with a Choice.
@@ -343,32 +1026,27 @@ class Parser(object):
                 document.
 
         Returns:
-            A list of ``Result`` objects
+            A list of ``Result`` objects.  This is empty for columnar parsers.
 
         """
         results = []
-        vote_type_els = contest_el.xpath('./VoteType')
-        for vt_el in vote_type_els:
+        new_result = self._get_result_factory()
+        get_or_create_result_jurisdiction = self._get_or_create_result_jurisdiction
+        totals_only = self.detail_level == 'totals'
+        for vt_el in contest_el.iterchildren('VoteType'):
             vote_type = vt_el.attrib['name']
             # Add one result for the jurisdiction
-            results.append(Result(
-                contest=contest,
-                vote_type=vote_type,
-                jurisdiction=None,
-                votes=int(vt_el.attrib['votes']),
-                choice=None
-            ))
-            # The subjurisdiction elements are either ``Precinct`` for county or
-            # city files or ``County`` for state files
-            for subjurisdiction_el in vt_el.xpath('./Precinct') + vt_el.xpath('./County'):
-                subjurisdiction = self._get_or_create_result_jurisdiction(subjurisdiction_el)
-                results.append(Result(
-                    contest=contest,
-                    vote_type=vote_type,
-                    jurisdiction=subjurisdiction,
-                    votes=int(subjurisdiction_el.attrib['votes']),
-                    choice=None
-                ))
+            result = new_result(contest, vote_type, None, int(vt_el.attrib['votes']), None)
+            if result is not None:
+                results.append(result)
+            if totals_only:
+                continue
+            for subjurisdiction_el in vt_el.iterchildren(*SUBJURISDICTION_TAGS):
+                subjurisdiction = get_or_create_result_jurisdiction(subjurisdiction_el)
+                result = new_result(contest, vote_type, subjurisdiction,
+                                    int(subjurisdiction_el.attrib['votes']), None)
+                if result is not None:
+                    results.append(result)
 
         return results
 
@@ -385,7 +1063,7 @@ class Parser(object):
 
         """
         return [self._parse_choice(c_el, contest)
-                for c_el in contest_el.xpath('Choice')]
+                for c_el in contest_el.iterchildren('Choice')]
 
     def _parse_choice(self, contest_el, contest):
         """
@@ -412,35 +1090,31 @@ class Parser(object):
             party=party,
             total_votes=int(contest_el.attrib['totalVotes']),
         )
-
-        for vt_el in contest_el.xpath('./VoteType'):
+        if self.columnar:
+            self._store.add_choice(choice)
+            start = len(self._store)
+
+        new_result = self._get_result_factory()
+        get_or_create_result_jurisdiction = self._get_or_create_result_jurisdiction
+        parse_votes = self._parse_votes
+        totals_only = self.detail_level == 'totals'
+        for vt_el in contest_el.iterchildren('VoteType'):
             vote_type = vt_el.attrib['name']
-            try:
-                votes=int(vt_el.attrib['votes'])
-            except:
-                votes = vt_el.attrib['votes']
-            choice.add_result(Result(
-                contest=contest,
-                vote_type=vote_type,
-                jurisdiction=None,
-                votes=votes,
-                choice=choice
-            ))
-
-            for subjurisdiction_el in vt_el.xpath('./Precinct') + vt_el.xpath('./County'):
-                subjurisdiction = self.get_result_jurisdiction(subjurisdiction_el.attrib['name'])
-                subjurisdiction = self._get_or_create_result_jurisdiction(subjurisdiction_el)
-                try:
-                    votes=int(subjurisdiction_el.attrib['votes'])
-                except:
-                    votes = subjurisdiction_el.attrib['votes']
-                choice.add_result(Result(
-                    contest=contest,
-                    vote_type=vote_type,
-                    jurisdiction=subjurisdiction,
-                    votes=votes,
-                    choice=choice
-                ))
+            result = new_result(contest, vote_type, None, parse_votes(vt_el.attrib['votes']), choice)
+            if result is not None:
+                choice.add_result(result)
+            if totals_only:
+                continue
+
+            for subjurisdiction_el in vt_el.iterchildren(*SUBJURISDICTION_TAGS):
+                subjurisdiction = get_or_create_result_jurisdiction(subjurisdiction_el)
+                votes = parse_votes(subjurisdiction_el.attrib['votes'])
+                result = new_result(contest, vote_type, subjurisdiction, votes, choice)
+                if result is not None:
+                    choice.add_result(result)
+
+        if self.columnar:
+            choice._results = self._store.view(start, len(self._store))
 
         return choice
 
@@ -466,10 +1140,46 @@ class Parser(object):
         return s == "true"
 
 
+# Tags of the elements within a ``VoteType`` element that hold the results
+# for a subjurisdiction.  These are ``Precinct`` for county or city files or
+# ``County`` for state files.
+SUBJURISDICTION_TAGS = (
+    'Precinct',
+    'County',
+)
+
+# Tags of the element that holds the aggregate turnout and follows the
+# header elements.  County and city files use ``VoterTurnout`` and state
+# files use ``ElectionVoterTurnout``.
+TURNOUT_TAGS = (
+    'VoterTurnout',
+    'ElectionVoterTurnout',
+)
+
+# Values of the ``detail_level`` argument of ``Parser.parse``.  ``totals``
+# skips the subjurisdiction elements of each ``VoteType``.
+DETAIL_LEVELS = (
+    'full',
+    'totals',
+)
+
+# Top-level elements handled by ``Parser._iterparse``
+STREAM_TAGS = TURNOUT_TAGS + (
+    'Contest',
+)
+
+
 class ResultAggregatorMixin(object):
     """
     Mixin class for classes that have related results
+
+    The mixin has no slots of its own.  Classes using it keep their results
+    in the instance dictionary, as subclasses of ``tuple`` can't add
+    non-empty ``__slots__``.
     """
+
+    __slots__ = ()
+
     def _init_results(self):
         """Initialize the list that holds results"""
         self._results = []
@@ -508,6 +1218,14 @@ RESULT_JURISDICTION_FIELD_CONVERTERS = {
     'precincts_reporting_percent': float,
 }
 
+# (field, XML attribute, converter) for each ``ResultJurisdiction`` field that
+# is read from an element attribute
+RESULT_JURISDICTION_ATTRIBUTES = [
+    (f, Parser._underscore_to_camel(f), RESULT_JURISDICTION_FIELD_CONVERTERS.get(f))
+    for f in RESULT_JURISDICTION_FIELDS
+    if f != 'level'
+]
+
 
 class ResultJurisdiction(
     ResultAggregatorMixin,
@@ -537,6 +1255,19 @@ CONTEST_FIELDS = [
     'counties_reported',
 ]
 
+# (field, XML attribute, converter) for each ``Contest`` field
+CONTEST_ATTRIBUTES = [
+    ('key', 'key', None),
+    ('text', 'text', None),
+    ('vote_for', 'voteFor', int),
+    ('is_question', 'isQuestion', Parser._parse_boolean),
+    ('precincts_reporting', 'precinctsReporting', int),
+    ('precincts_participating', 'precinctsParticipating', int),
+    ('precincts_reported', 'precinctsReported', int),
+    ('counties_participating', 'countiesParticipating', int),
+    ('counties_reported', 'countiesReported', int),
+]
+
 
 class Contest(ResultAggregatorMixin, namedtuple('ContestBase', CONTEST_FIELDS)):
     """
@@ -602,10 +1333,342 @@ RESULT_FIELDS = [
 
 class Result(namedtuple('ResultBase', RESULT_FIELDS)):
     """Votes received for a choice in a contest"""
-    def __new__(cls, *args, **kwargs):
-        self = super(Result, cls).__new__(cls, *args, **kwargs)
-        if self.jurisdiction is not None:
+
+    # There is a ``Result`` for every vote cell in a report, so don't give
+    # each of them an instance dictionary
+    __slots__ = ()
+
+    def __new__(cls, contest, vote_type, jurisdiction, votes, choice):
+        # This is called for every vote cell in a report, so bypass the
+        # argument handling in the namedtuple's ``__new__``
+        self = tuple.__new__(cls, (contest, vote_type, jurisdiction, votes, choice))
+        if jurisdiction is not None:
             # When a result is created for a Jurisdiction, add it to the
             # Jurisdiction's list of results
-            self.jurisdiction.add_result(self)
+            jurisdiction.add_result(self)
         return self
+
+
+REPORT_HEADER_FIELDS = [
+    'timestamp',
+    'election_name',
+    'election_date',
+    'region',
+    'total_voters',
+    'ballots_cast',
+    'voter_turnout',
+]
+
+
+class ReportHeader(namedtuple('ReportHeaderBase', REPORT_HEADER_FIELDS)):
+    """
+    Election metadata from the start of a report, as returned by
+    ``Parser.peek``
+    """
+    __slots__ = ()
+
+
+class ContestChanges(namedtuple('ContestChangesBase', ['added', 'changed', 'removed', 'unchanged'])):
+    """
+    Keys of the contests added, changed, removed and left unchanged by
+    ``Parser.update``
+    """
+    __slots__ = ()
+
+
+RESULT_ROW_FIELDS = [
+    'contest',
+    'choice',
+    'party',
+    'vote_type',
+    'jurisdiction',
+    'votes',
+]
+
+
+class ResultRow(namedtuple('ResultRowBase', RESULT_ROW_FIELDS)):
+    """
+    A flat result row, as yielded by ``Parser.iter_results``
+
+    All fields other than ``votes`` hold the text of the corresponding XML
+    attributes rather than model objects.
+
+    """
+    __slots__ = ()
+
+
+class ResultStore(object):
+    """
+    Compact, columnar storage for the results of a parsed report
+
+    Rather than one ``Result`` object per vote cell, each result is stored
+    as a row of integer codes for its contest, choice, jurisdiction and vote
+    type, plus its vote count, in typed arrays.  ``Result`` objects are only
+    built when rows are accessed, via ``ResultView`` sequences.
+
+    Choice and jurisdiction codes are -1 for results without a choice or
+    jurisdiction.
+
+    Stores pickle to plain tuples and arrays, without the references between
+    model objects, so they can be passed cheaply between processes.
+
+    """
+    def __init__(self):
+        self.contests = []
+        self.choices = []
+        self.jurisdictions = []
+        self.vote_types = []
+        self.contest_ids = array('i')
+        self.choice_ids = array('i')
+        self.jurisdiction_ids = array('i')
+        self.vote_type_ids = array('i')
+        self.votes = array('q')
+        # Vote counts that aren't integers, keyed by row number
+        self._raw_votes = {}
+        self._codes = {}
+        self._vote_type_codes = {}
+        self._jurisdiction_rows = None
+
+    def __len__(self):
+        return len(self.votes)
+
+    def add_contest(self, contest):
+        """Add a ``Contest`` to the store, returning its code"""
+        return self._code(contest, self.contests)
+
+    def add_choice(self, choice):
+        """Add a ``Choice`` to the store, returning its code"""
+        return self._code(choice, self.choices)
+
+    def add_jurisdiction(self, jurisdiction):
+        """Add a ``ResultJurisdiction`` to the store, returning its code"""
+        return self._code(jurisdiction, self.jurisdictions)
+
+    def _code(self, obj, objects):
+        """Get the integer code for a model object, assigning one if needed"""
+        if obj is None:
+            return -1
+        try:
+            return self._codes[id(obj)]
+        except KeyError:
+            code = self._codes[id(obj)] = len(objects)
+            objects.append(obj)
+            return code
+
+    def append(self, contest, vote_type, jurisdiction, votes, choice):
+        """
+        Add a result to the store
+
+        Args:
+            contest: ``Contest`` object for the result
+            vote_type: String containing the vote type
+            jurisdiction: ``ResultJurisdiction`` object, or None
+            votes: Vote count
+            choice: ``Choice`` object, or None
+
+        """
+        vote_type_code = self._vote_type_code(vote_type)
+
+        if type(votes) is not int:
+            self._raw_votes[len(self.votes)] = votes
+            votes = 0
+
+        self.contest_ids.append(self._code(contest, self.contests))
+        self.choice_ids.append(self._code(choice, self.choices))
+        self.jurisdiction_ids.append(self._code(jurisdiction, self.jurisdictions))
+        self.vote_type_ids.append(vote_type_code)
+        self.votes.append(votes)
+        self._jurisdiction_rows = None
+
+    def _vote_type_code(self, vote_type):
+        """Get the integer code for a vote type, assigning one if needed"""
+        try:
+            return self._vote_type_codes[vote_type]
+        except KeyError:
+            code = self._vote_type_codes[vote_type] = len(self.vote_types)
+            self.vote_types.append(vote_type)
+            return code
+
+    def get(self, i):
+        """
+        Build the ``Result`` object for row ``i``
+
+        The result is not added to its jurisdiction's list of results, as
+        that list is itself backed by the store.
+
+        """
+        choice_id = self.choice_ids[i]
+        jurisdiction_id = self.jurisdiction_ids[i]
+        return Result._make((
+            self.contests[self.contest_ids[i]],
+            self.vote_types[self.vote_type_ids[i]],
+            self.jurisdictions[jurisdiction_id] if jurisdiction_id >= 0 else None,
+            self._raw_votes.get(i, self.votes[i]),
+            self.choices[choice_id] if choice_id >= 0 else None,
+        ))
+
+    def view(self, start=0, stop=None):
+        """
+        Get a ``ResultView`` of a contiguous range of rows
+        """
+        if stop is None:
+            stop = len(self)
+        return ResultView(self, range(start, stop))
+
+    def jurisdiction_view(self, jurisdiction):
+        """
+        Get a ``ResultView`` of the rows for a ``ResultJurisdiction``
+
+        The rows are looked up when the view is first accessed.
+
+        """
+        return ResultView(self, lambda: self._rows_for_jurisdiction(jurisdiction))
+
+    def __getstate__(self):
+        contest_codes = {id(c): i for i, c in enumerate(self.contests)}
+        return {
+            'contests': [tuple(c) for c in self.contests],
+            'contest_rows': [self._view_rows(c) for c in self.contests],
+            'choices': [(contest_codes[id(c.contest)],) + tuple(c)[1:] for c in self.choices],
+            'choice_rows': [self._view_rows(c) for c in self.choices],
+            'jurisdictions': [tuple(j) for j in self.jurisdictions],
+            'vote_types': self.vote_types,
+            'contest_ids': self.contest_ids,
+            'choice_ids': self.choice_ids,
+            'jurisdiction_ids': self.jurisdiction_ids,
+            'vote_type_ids': self.vote_type_ids,
+            'votes': self.votes,
+            'raw_votes': self._raw_votes,
+        }
+
+    def __setstate__(self, state):
+        self.__init__()
+        for attr in ('vote_types', 'contest_ids', 'choice_ids', 'jurisdiction_ids',
+                     'vote_type_ids', 'votes'):
+            setattr(self, attr, state[attr])
+        self._raw_votes = state['raw_votes']
+        self._vote_type_codes = {v: i for i, v in enumerate(self.vote_types)}
+
+        for fields, rows in zip(state['contests'], state['contest_rows']):
+            contest = Contest(*fields)
+            contest._results = ResultView(self, rows)
+            self.add_contest(contest)
+        for fields, rows in zip(state['choices'], state['choice_rows']):
+            contest = self.contests[fields[0]]
+            choice = Choice(contest, *fields[1:])
+            choice._results = ResultView(self, rows)
+            contest._choices.append(choice)
+            self.add_choice(choice)
+        for fields in state['jurisdictions']:
+            jurisdiction = ResultJurisdiction(*fields)
+            jurisdiction._results = self.jurisdiction_view(jurisdiction)
+            self.add_jurisdiction(jurisdiction)
+
+    @classmethod
+    def _view_rows(cls, obj):
+        """Get the rows of a contest or choice's results in its store"""
+        results = obj._results
+        return results.rows if isinstance(results, ResultView) else range(0)
+
+    def _rows_for_jurisdiction(self, jurisdiction):
+        if self._jurisdiction_rows is None:
+            # Index every jurisdiction in a single pass over the column
+            rows = {}
+            for i, code in enumerate(self.jurisdiction_ids):
+                if code >= 0:
+                    rows.setdefault(code, array('l')).append(i)
+            self._jurisdiction_rows = rows
+
+        code = self._codes.get(id(jurisdiction))
+        return self._jurisdiction_rows.get(code, array('l'))
+
+
+class ResultView(object):
+    """
+    A read-only sequence of ``Result`` objects backed by a ``ResultStore``
+
+    Args:
+        store: The ``ResultStore`` holding the results
+        rows: Sequence of row numbers in the store, or a callable that
+            returns one when the view is first accessed
+
+    """
+    def __init__(self, store, rows):
+        self._store = store
+        self._rows = rows
+
+    @property
+    def rows(self):
+        """Row numbers, in the store, of the results in this view"""
+        if callable(self._rows):
+            self._rows = self._rows()
+        return self._rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._store.get(row) for row in self.rows[i]]
+        return self._store.get(self.rows[i])
+
+    def __iter__(self):
+        get = self._store.get
+        for row in self.rows:
+            yield get(row)
+
+    def __eq__(self, other):
+        if isinstance(other, (ResultView, ChainedResultView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        return '<ResultView: {} results>'.format(len(self))
+
+
+class ChainedResultView(object):
+    """
+    A read-only sequence of the ``Result`` objects of several views, in
+    order, which indexes into each view rather than copying their rows
+
+    Args:
+        views: Sequence of ``ResultView`` objects
+
+    """
+    def __init__(self, views):
+        self.views = list(views)
+        # Number of results up to the end of each view
+        self._ends = list(itertools.accumulate(len(v) for v in self.views))
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('result index out of range')
+        view_index = bisect.bisect_right(self._ends, i)
+        start = self._ends[view_index - 1] if view_index else 0
+        return self.views[view_index][i - start]
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.views)
+
+    def __eq__(self, other):
+        if isinstance(other, (ResultView, ChainedResultView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        return '<ChainedResultView: {} results>'.format(len(self))
@@ -0,0 +1,486 @@
+from collections import namedtuple
+import concurrent.futures
+from email.utils import parsedate_to_datetime
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+import zipfile
+import zlib
+
+import requests
+import requests.adapters
+
+CLARITY_RESULTS_HOSTNAMES = ["results.enr.clarityelections.com", "www.enr-scvotes.org", "electionresults.iowa.gov"]
+UA_HEADER = {
+    "User-Agent": "Mozilla/5.0 (platform; rv:geckoversion) Gecko/geckotrail Firefox/firefoxversion"
+}
+# Statuses that hosts return when they don't allow HEAD requests, which are
+# retried as a GET of a single byte
+HEAD_REJECTED_STATUSES = (403, 405, 501)
+CONTENT_RANGE_REGEX = re.compile(r'^bytes\s+\d+-\d+/(?P<size>\d+)$')
+# Content-Range of a 416 response, giving the size of the whole file
+UNSATISFIED_RANGE_REGEX = re.compile(r'^bytes\s+\*/(?P<size>\d+)$')
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Statuses for transient server errors, which are retried
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TransportPolicy(object):
+
+    """
+    Timeouts, retries and rate limits applied to every request sent by a
+    ``Transport``.
+    """
+
+    def __init__(self, timeout=(10, 60), retries=3, backoff=0.5, max_backoff=30,
+                 max_requests_per_second=None, rate_limited_hosts=CLARITY_RESULTS_HOSTNAMES):
+        """
+        Args:
+            timeout: Timeout for requests, in seconds, or a ``(connect,
+                read)`` tuple.  None waits forever.
+            retries: Number of times to retry a request that fails with a
+                connection error, a timeout or a status in
+                ``RETRY_STATUSES``.
+            backoff: Maximum seconds to wait before the first retry.  The
+                maximum doubles with each retry, and the actual wait is
+                chosen at random up to the maximum so that clients don't
+                retry in lockstep.
+            max_backoff: Upper limit on the wait between retries.
+            max_requests_per_second: Maximum rate of requests to each of
+                ``rate_limited_hosts``, or None for no limit.
+            rate_limited_hosts: Hostnames that ``max_requests_per_second``
+                applies to.
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_requests_per_second = max_requests_per_second
+        self.rate_limited_hosts = rate_limited_hosts
+        self._next_request_times = {}
+        self._lock = threading.Lock()
+
+    def get_backoff(self, attempt):
+        """
+        Returns the number of seconds to wait before retrying a request that
+        has failed ``attempt`` times.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def wait_for_host(self, url):
+        """
+        Wait until another request may be sent to a URL's host without
+        exceeding ``max_requests_per_second``.
+        """
+        delay = self.get_host_delay(url)
+        if delay:
+            time.sleep(delay)
+
+    def get_host_delay(self, url):
+        """
+        Reserve the next request to a URL's host, returning the number of
+        seconds to wait before sending it so as not to exceed
+        ``max_requests_per_second``.
+        """
+        host = urlsplit(url).hostname
+        if not self.max_requests_per_second or host not in self.rate_limited_hosts:
+            return 0
+        interval = 1.0 / self.max_requests_per_second
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_times.get(host, now))
+            self._next_request_times[host] = request_time + interval
+        return request_time - now
+
+
+class Transport(object):
+
+    """
+    A pool of HTTP connections and worker threads shared by a
+    ``Jurisdiction``, its subjurisdictions and anything else crawling the
+    same Clarity sites, so that connections and threads are reused.
+
+    A ``Transport`` can be used anywhere a ``requests.Session`` is accepted
+    for ``get`` and ``head`` requests.
+    """
+
+    def __init__(self, session=None, executor=None, max_workers=10, pool_size=10, policy=None):
+        """
+        Args:
+            session: ``requests.Session`` to send requests with.  By default
+                one is created with a pool of ``pool_size`` connections per
+                host.
+            executor: ``concurrent.futures.Executor`` to run concurrent
+                requests on.  By default a thread pool of ``max_workers``
+                threads is created when it's first needed.
+            max_workers: Number of threads for the default executor.
+            pool_size: Number of connections kept open to each host by the
+                default session.
+            policy: ``TransportPolicy`` for timeouts, retries and rate
+                limits.  Defaults to a ``TransportPolicy`` with its default
+                settings.
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.max_workers = max_workers
+        self.policy = policy if policy is not None else TransportPolicy()
+        self._executor = executor
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def request(self, method, url, headers=None, **kwargs):
+        """
+        Send a request with the Clarify user agent, applying the transport's
+        policy.
+
+        Returns:
+            A ``requests.Response``.  If the request still fails after the
+            policy's retries, the last response is returned or the last
+            exception raised.
+        """
+        kwargs.setdefault('timeout', self.policy.timeout)
+        headers = dict(UA_HEADER, **(headers or {}))
+        attempt = 0
+        while True:
+            self.policy.wait_for_host(url)
+            try:
+                r = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.policy.retries:
+                    raise
+            else:
+                if r.status_code not in RETRY_STATUSES or attempt >= self.policy.retries:
+                    return r
+                r.close()
+            attempt += 1
+            time.sleep(self.policy.get_backoff(attempt))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Run a function on the transport's executor.
+
+        Returns:
+            A ``concurrent.futures.Future``.
+        """
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def close(self):
+        """
+        Close the transport's connections and shut down its executor.
+        """
+        self.session.close()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """
+    Returns the ``Transport`` used by jurisdictions that aren't given one,
+    creating it the first time it's needed.
+
+    Sharing one transport means that jurisdictions created separately, for
+    example each county passed to a ``VersionWatcher``, share a single
+    connection pool and thread pool rather than each starting their own.
+    It is never closed, as any jurisdiction may still be using it.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
+
+
+class ProbeResult(namedtuple('ProbeResult', 'url exists status_code size last_modified')):
+
+    """
+    The result of checking whether a URL exists without downloading it.
+
+    ``size`` is the length of the resource in bytes and ``last_modified``
+    is a ``datetime``, or None if the host didn't report them.
+    """
+
+    __slots__ = ()
+
+
+def probe(url, session=None):
+    """
+    Check whether a URL exists, and find its size and modification time,
+    while transferring as little of it as possible.
+
+    A HEAD request is tried first.  If the host rejects HEAD requests, the
+    first byte of the resource is requested instead.
+
+    Args:
+        url: URL to check.
+        session: ``Transport`` or ``requests.Session`` to send requests
+            with.  Defaults to ``get_default_transport()``.
+
+    Returns:
+        A ``ProbeResult``.
+
+    """
+    session = session if session is not None else get_default_transport()
+    r = session.head(url, headers=UA_HEADER, allow_redirects=True)
+    if r.status_code in HEAD_REJECTED_STATUSES:
+        headers = dict(UA_HEADER, Range='bytes=0-0')
+        # Stream the response so that hosts that ignore the Range header
+        # don't send the whole body
+        r = session.get(url, headers=headers, stream=True)
+        r.close()
+    return probe_result(url, r)
+
+
+def probe_result(url, response):
+    """
+    Returns a ``ProbeResult`` from the status and headers of the response
+    to a HEAD or single-byte range request.
+    """
+    exists = response.status_code in (200, 206)
+    size = None
+    last_modified = None
+    if exists:
+        size = _get_size(response)
+        last_modified = _parse_http_date(response.headers.get('Last-Modified'))
+    return ProbeResult(url, exists, response.status_code, size, last_modified)
+
+
+def _get_size(response):
+    if response.status_code == 206:
+        m = CONTENT_RANGE_REGEX.match(response.headers.get('Content-Range', ''))
+        return int(m.group('size')) if m else None
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return None
+
+
+def _parse_http_date(value):
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class DownloadInterruptedError(requests.exceptions.RequestException):
+
+    """
+    Raised by ``download`` when the connection fails after the response
+    has started, while its body is being read.
+
+    Failures before the response starts are retried by a ``Transport``, but
+    these can only be retried by downloading again, resuming from the
+    partial file.
+    """
+
+
+class DownloadResult(namedtuple('DownloadResult', 'url path size downloaded elapsed resumed headers')):
+
+    """
+    The result of downloading a file.
+
+    ``size`` is the size of the file in bytes and ``downloaded`` the number
+    of bytes transferred to produce it, which is smaller when a partial
+    download was resumed.  ``elapsed`` is the time spent downloading, in
+    seconds.  ``headers`` are the headers of the response.
+    """
+
+    __slots__ = ()
+
+    @property
+    def bytes_per_second(self):
+        """
+        The download rate, or None if nothing was downloaded.
+        """
+        if not self.elapsed:
+            return None
+        return self.downloaded / self.elapsed
+
+
+def download(url, output_fn, session=None, chunk_size=DOWNLOAD_CHUNK_SIZE, verify_zip=False,
+             headers=None):
+    """
+    Stream a URL to a file, without holding it in memory.
+
+    The response is written in chunks to ``output_fn`` with a ``.part``
+    suffix, which is renamed to ``output_fn`` once the download is
+    complete.  If a partial file is left by an interrupted download, only
+    the rest of the file is requested.
+
+    The URL and the ETag or Last-Modified date of the response are saved
+    next to the partial file, with a ``.part.json`` suffix, and the rest of
+    the file is only requested, with an ``If-Range`` header, if the URL is
+    the same.  If the file has changed since, for example because a new
+    version of a report has been published, the host sends the whole file
+    again.  Partial files without a saved URL and validator are discarded.
+
+    Args:
+        url: URL to download.
+        output_fn: Path to save the file to.
+        session: ``Transport`` or ``requests.Session`` to send requests
+            with.  Defaults to ``get_default_transport()``.
+        chunk_size: Number of bytes to read at a time.
+        verify_zip: If True, check that the downloaded file is a valid zip
+            file before renaming it.
+        headers: Additional request headers, such as the ``If-None-Match``
+            header of a conditional request.
+
+    Returns:
+        A ``DownloadResult``, or None if the host responds to a conditional
+        request with 304 Not Modified, in which case nothing is written.
+
+    Raises:
+        ``requests.HTTPError`` if the response has an error status, in
+        which case nothing is written.  ``DownloadInterruptedError`` if the
+        connection fails while the file is being read, in which case the
+        partial file is kept so that the download can be resumed.
+        ``zipfile.BadZipFile`` if
+        ``verify_zip`` is True and the file isn't a valid zip file, in which
+        case the partial file is removed.
+
+    """
+    session = session if session is not None else get_default_transport()
+    partial_fn = output_fn + '.part'
+    validator = _load_partial_validator(url, partial_fn)
+    offset = os.path.getsize(partial_fn) if validator is not None else 0
+    request_headers = dict(UA_HEADER)
+    if headers:
+        request_headers.update(headers)
+    if offset:
+        request_headers['Range'] = 'bytes={}-'.format(offset)
+        request_headers['If-Range'] = validator
+
+    downloaded = 0
+    start = time.time()
+    r = session.get(url, headers=request_headers, stream=True)
+    try:
+        if r.status_code == 304:
+            return None
+        if offset and r.status_code == 416:
+            # The partial file is already complete, unless the file is now
+            # a different size
+            if _get_unsatisfied_range_size(r) != offset:
+                _remove_partial(partial_fn)
+                return download(url, output_fn, session, chunk_size, verify_zip, headers)
+        else:
+            r.raise_for_status()
+            if offset and r.status_code == 206 and _get_validator(r) not in (None, validator):
+                # The host ignored If-Range, and the file has changed
+                _remove_partial(partial_fn)
+                return download(url, output_fn, session, chunk_size, verify_zip, headers)
+            if r.status_code != 206:
+                # The host ignored the Range header, or the file has
+                # changed, so start again
+                offset = 0
+                _save_partial_validator(url, partial_fn, _get_validator(r))
+            try:
+                with open(partial_fn, 'ab' if offset else 'wb') as f:
+                    for chunk in r.iter_content(chunk_size):
+                        f.write(chunk)
+                        downloaded += len(chunk)
+            except requests.exceptions.RequestException as e:
+                raise DownloadInterruptedError("Download of {} was interrupted after {} bytes".format(
+                    url, offset + downloaded)) from e
+    finally:
+        r.close()
+    elapsed = time.time() - start
+
+    if verify_zip and not is_valid_zip(partial_fn):
+        _remove_partial(partial_fn)
+        raise zipfile.BadZipFile("File downloaded from {} is not a valid zip file".format(url))
+    os.replace(partial_fn, output_fn)
+    _remove_partial(partial_fn)
+    return DownloadResult(url, output_fn, os.path.getsize(output_fn), downloaded, elapsed, offset > 0,
+                          r.headers)
+
+
+def _get_validator(response):
+    """
+    Returns the value of a response's strong ETag, or otherwise its
+    Last-Modified date, for use in an ``If-Range`` header, or None.
+    """
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def _get_unsatisfied_range_size(response):
+    m = UNSATISFIED_RANGE_REGEX.match(response.headers.get('Content-Range', ''))
+    return int(m.group('size')) if m else None
+
+
+def _load_partial_validator(url, partial_fn):
+    """
+    Returns the validator saved for a partial download of a URL, or None
+    if there's no partial file that can be resumed, in which case any
+    partial file is removed.
+    """
+    if not os.path.exists(partial_fn):
+        return None
+    try:
+        with open(partial_fn + '.json') as f:
+            metadata = json.load(f)
+    except (IOError, ValueError):
+        metadata = {}
+    if metadata.get('url') == url and metadata.get('validator'):
+        return metadata['validator']
+    _remove_partial(partial_fn)
+    return None
+
+
+def _save_partial_validator(url, partial_fn, validator):
+    with open(partial_fn + '.json', 'w') as f:
+        json.dump({'url': url, 'validator': validator}, f)
+
+
+def _remove_partial(partial_fn):
+    """
+    Removes a partial download and its saved validator, if they exist.
+    """
+    for fn in (partial_fn, partial_fn + '.json'):
+        try:
+            os.remove(fn)
+        except FileNotFoundError:
+            pass
+
+
+def is_valid_zip(path):
+    """
+    Returns True if the file at a path is a zip file whose members all
+    pass their CRC checks.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return archive.testzip() is None
+    except (zipfile.BadZipFile, zlib.error, EOFError):
+        return False
@@ -0,0 +1,212 @@
+import asyncio
+from collections import namedtuple
+import time
+
+import requests
+
+from .async_jurisdiction import AsyncJurisdiction
+from .jurisdiction import Jurisdiction
+
+
+class VersionChange(namedtuple('VersionChange', 'jurisdiction old_ver new_ver report_url')):
+
+    """
+    A new version of a jurisdiction's results.
+
+    ``old_ver`` is None if the jurisdiction's version wasn't known before.
+    ``report_url`` is the URL of the detailed report for the new version.
+    """
+
+    __slots__ = ()
+
+
+class BaseVersionWatcher(object):
+
+    """
+    Tracks the results versions of a set of jurisdictions, deciding which
+    newly polled versions are changes.
+
+    Jurisdictions whose URLs share a ``current_ver.txt`` are only polled
+    once.  A jurisdiction's last known version starts as the version in its
+    URL, if any, and is updated when a change is found, so that the
+    jurisdiction's report URLs point at the new version.
+    """
+
+    # Class of the jurisdictions that can be watched
+    jurisdiction_class = None
+
+    def __init__(self, jurisdictions, interval=60, fmt='xml'):
+        """
+        Args:
+            jurisdictions: Jurisdictions to watch.
+            interval: Seconds between the start of each poll.
+            fmt: Format of the report URLs of changes.
+
+        Raises:
+            ``TypeError`` if a jurisdiction isn't a ``jurisdiction_class``.
+
+        """
+        self.jurisdictions = {}
+        for jurisdiction in jurisdictions:
+            if not isinstance(jurisdiction, self.jurisdiction_class):
+                raise TypeError("{} can only watch {} objects".format(
+                    type(self).__name__, self.jurisdiction_class.__name__))
+            self.jurisdictions.setdefault(self._get_current_ver_url(jurisdiction), jurisdiction)
+        self.interval = interval
+        self.fmt = fmt
+        self.versions = {
+            url: jurisdiction.parsed_url.get('version')
+            for url, jurisdiction in self.jurisdictions.items()
+        }
+
+    @classmethod
+    def _get_current_ver_url(cls, jurisdiction):
+        return jurisdiction.construct_url(jurisdiction.parsed_url, 'current_ver.txt', include_version=False)
+
+    def _record_version(self, url, version):
+        """
+        Record a polled version, returning a ``VersionChange`` if it is newer
+        than the last known version, otherwise None.
+        """
+        if not version:
+            return None
+        version = version.strip()
+        old_ver = self.versions[url]
+        if not self._is_newer(version, old_ver):
+            return None
+
+        self.versions[url] = version
+        jurisdiction = self.jurisdictions[url]
+        jurisdiction.parsed_url['version'] = version
+        jurisdiction.current_ver = version
+        return VersionChange(jurisdiction, old_ver, version, jurisdiction._get_report_url(self.fmt))
+
+    @classmethod
+    def _is_newer(cls, version, old_ver):
+        if old_ver is None:
+            return True
+        # Versions are increasing numbers.  Ignore older versions, which can
+        # be returned by stale caches.
+        if version.isdigit() and old_ver.isdigit():
+            return int(version) > int(old_ver)
+        return version != old_ver
+
+
+class VersionWatcher(BaseVersionWatcher):
+
+    """
+    Polls ``current_ver.txt`` for a set of ``Jurisdiction`` objects and
+    yields a ``VersionChange`` for each new version::
+
+        for change in VersionWatcher(jurisdictions, interval=120):
+            change.jurisdiction.download_report('xml', 'detail.zip')
+
+    Polling is paused while the caller handles changes, so changes are
+    never produced faster than they are consumed.
+    """
+
+    jurisdiction_class = Jurisdiction
+
+    def poll(self):
+        """
+        Poll each jurisdiction once, concurrently.
+
+        Returns:
+            A list of ``VersionChange`` objects.  Jurisdictions that couldn't
+            be polled are skipped until the next poll.
+        """
+        futures = [
+            (url, jurisdiction.transport.submit(
+                jurisdiction._fetch_current_ver, jurisdiction.url,
+                cache=jurisdiction.cache, transport=jurisdiction.transport))
+            for url, jurisdiction in self.jurisdictions.items()
+        ]
+        changes = []
+        for url, future in futures:
+            try:
+                change = self._record_version(url, future.result())
+            except requests.exceptions.RequestException:
+                continue
+            if change is not None:
+                changes.append(change)
+        return changes
+
+    def __iter__(self):
+        while True:
+            start = time.monotonic()
+            for change in self.poll():
+                yield change
+            time.sleep(max(0, self.interval - (time.monotonic() - start)))
+
+
+class AsyncVersionWatcher(BaseVersionWatcher):
+
+    """
+    Polls ``current_ver.txt`` for a set of ``AsyncJurisdiction`` objects
+    and produces a ``VersionChange`` for each new version::
+
+        async for change in AsyncVersionWatcher(jurisdictions, interval=120):
+            await change.jurisdiction.download_report('xml', 'detail.zip')
+
+    Changes are buffered in a queue of at most ``maxsize`` changes.  When
+    the queue is full, polling waits until the caller catches up.
+    """
+
+    jurisdiction_class = AsyncJurisdiction
+
+    def __init__(self, jurisdictions, interval=60, fmt='xml', maxsize=100):
+        """
+        Args:
+            jurisdictions: ``AsyncJurisdiction`` objects to watch.
+            interval: Seconds between the start of each poll.
+            fmt: Format of the report URLs of changes.
+            maxsize: Maximum number of changes waiting to be consumed.
+        """
+        super(AsyncVersionWatcher, self).__init__(jurisdictions, interval, fmt)
+        self.maxsize = maxsize
+
+    async def poll(self):
+        """
+        Poll each jurisdiction once, concurrently.
+
+        Returns:
+            A list of ``VersionChange`` objects.  Jurisdictions that couldn't
+            be polled are skipped until the next poll.
+        """
+        urls = list(self.jurisdictions)
+        versions = await asyncio.gather(*[self._get_version(url) for url in urls], return_exceptions=True)
+        changes = []
+        for url, version in zip(urls, versions):
+            if isinstance(version, Exception):
+                continue
+            change = self._record_version(url, version)
+            if change is not None:
+                changes.append(change)
+        return changes
+
+    async def _get_version(self, url):
+        r = await self.jurisdictions[url].client.get(url)
+        return r.text if r.status_code == 200 else None
+
+    async def _produce(self, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            for change in await self.poll():
+                await queue.put(change)
+            await asyncio.sleep(max(0, self.interval - (loop.time() - start)))
+
+    async def __aiter__(self):
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        producer = asyncio.ensure_future(self._produce(queue))
+        try:
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait([get, producer], return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    # Polling stopped with an error, so raise it
+                    get.cancel()
+                    producer.result()
+                yield get.result()
+        finally:
+            producer.cancel()
@@ -25,7 +25,7 @@ setup(
     description=('A library for scraping and parsing election results from '
                  'jurisdictions using Clarity elections systems.'),
     long_description=long_description,
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     include_package_data=True,
     install_requires=[
         'requests',
@@ -33,8 +33,10 @@ setup(
         'cssselect',
         'six',
         'python-dateutil',
-        'requests-futures',
     ],
+    extras_require={
+        'async': ['httpx'],
+    },
     tests_require=[
         'nose',
         'responses',
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from clarify.async_jurisdiction import AsyncClient, AsyncJurisdiction
+from clarify.jurisdiction import UNRESOLVED
+from clarify.transport import TransportPolicy
+
+
+def mock_client(handler, max_concurrency=10):
+    """
+    Returns an ``AsyncClient`` whose requests are answered by ``handler``.
+    """
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler),
+                               follow_redirects=True)
+    return AsyncClient(max_concurrency=max_concurrency, client=client)
+
+
+def routes_handler(routes):
+    """
+    Returns a request handler that responds from a dict mapping URLs to
+    response bodies, with a 404 for any other URL.
+    """
+    def handler(request):
+        url = str(request.url)
+        if url in routes:
+            return httpx.Response(200, content=routes[url])
+        return httpx.Response(404)
+    return handler
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncJurisdiction(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.url = 'https://results.enr.clarityelections.com/KY/15261/30235/en/summary.html'
+
+    def test_construct_makes_no_requests(self):
+        def handler(request):
+            raise AssertionError("Unexpected request for {}".format(request.url))
+
+        jurisdiction = AsyncJurisdiction(url=self.url, level='state', client=mock_client(handler))
+        self.assertEqual(jurisdiction.current_ver, '30235')
+        self.assertIs(jurisdiction.summary_url, UNRESOLVED)
+
+    def test_validates_arguments(self):
+        client = mock_client(routes_handler({}))
+        with self.assertRaises(ValueError):
+            AsyncJurisdiction(url='https://example.com/KY/15261/30235/en/summary.html',
+                              level='state', client=client)
+        with self.assertRaises(ValueError):
+            AsyncJurisdiction(url=self.url, level='country', client=client)
+
+    async def test_get_current_ver(self):
+        url = 'https://results.enr.clarityelections.com/KY/15261/en/summary.html'
+        client = mock_client(routes_handler({
+            'https://results.enr.clarityelections.com/KY/15261/current_ver.txt': b'30235',
+        }))
+        async with client:
+            jurisdiction = AsyncJurisdiction(url=url, level='state', client=client)
+            self.assertIsNone(jurisdiction.current_ver)
+            self.assertEqual(await jurisdiction.get_current_ver(), '30235')
+            self.assertEqual(jurisdiction.current_ver, '30235')
+            self.assertEqual(
+                jurisdiction._get_report_url('xml'),
+                'https://results.enr.clarityelections.com/KY/15261/30235/reports/detailxml.zip')
+
+    async def test_get_latest_summary_url(self):
+        base = 'https://results.enr.clarityelections.com/KY/15261'
+        client = mock_client(routes_handler({
+            base + '/current_ver.txt': b'30236',
+            base + '/30236/Web01/en/summary.html': b'',
+        }))
+        async with client:
+            jurisdiction = AsyncJurisdiction(url=self.url, level='state', client=client)
+            self.assertEqual(await jurisdiction.get_latest_summary_url(),
+                             base + '/30236/Web01/en/summary.html')
+
+    async def test_report_url_and_summary_url(self):
+        base = 'https://results.enr.clarityelections.com/KY/15261/30235'
+        client = mock_client(routes_handler({
+            base + '/reports/detailxml.zip': b'',
+        }))
+        async with client:
+            jurisdiction = AsyncJurisdiction(url=self.url, level='state', client=client)
+            self.assertEqual(await jurisdiction.report_url('xml'), base + '/reports/detailxml.zip')
+            self.assertIsNone(await jurisdiction.report_url('xls'))
+            self.assertIsNone(await jurisdiction.get_summary_url())
+            self.assertIsNone(jurisdiction.summary_url)
+
+    async def test_download_report(self):
+        content = b'PK' + b'x' * 100000
+        client = mock_client(routes_handler({
+            'https://results.enr.clarityelections.com/KY/15261/30235/reports/detailxml.zip': content,
+        }))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_fn = os.path.join(tmpdir, 'detailxml.zip')
+            async with client:
+                jurisdiction = AsyncJurisdiction(url=self.url, level='state', client=client)
+                self.assertTrue(await jurisdiction.download_report('xml', output_fn))
+                self.assertFalse(await jurisdiction.download_report('xls', output_fn + '.xls'))
+
+            with open(output_fn, 'rb') as f:
+                self.assertEqual(f.read(), content)
+            self.assertFalse(os.path.exists(output_fn + '.xls'))
+
+    async def test_get_subjurisdictions_json(self):
+        url = 'https://results.enr.clarityelections.com/GA/63991/184321/Web02/en/summary.html'
+        base = 'https://results.enr.clarityelections.com/GA/63991'
+        settings = {'settings': {'electiondetails': {'participatingcounties': [
+            'Appling|63993|184323|1/4/2016 1:47:17 PM EST|16',
+            'Bacon|63994|184324|1/4/2016 1:47:17 PM EST|16',
+        ]}}}
+        client = mock_client(routes_handler({
+            base + '/current_ver.txt': b'184321',
+            base + '/184321/json/en/summary.json': b'{}',
+            base + '/184321/json/en/electionsettings.json': json.dumps(settings).encode('utf-8'),
+        }))
+        async with client:
+            jurisdiction = AsyncJurisdiction(url=url, level='state', client=client)
+            subjurisdictions = await jurisdiction.get_subjurisdictions()
+
+        self.assertEqual([j.name for j in subjurisdictions], ['Appling', 'Bacon'])
+        self.assertEqual(
+            subjurisdictions[0].url,
+            'https://results.enr.clarityelections.com/GA/Appling/63993/184323/Web01/en/summary.html')
+        for subjurisdiction in subjurisdictions:
+            self.assertIsInstance(subjurisdiction, AsyncJurisdiction)
+            self.assertIs(subjurisdiction.client, client)
+
+    async def test_get_subjurisdictions_scrape(self):
+        base = 'https://results.enr.clarityelections.com'
+        counties = ['Adair', 'Allen', 'Anderson']
+        routes = {
+            base + '/KY/15261/30235/en/select-county.html': ''.join(
+                '<ul><li><a id="{0}" value="/{0}/15262/index.html"></a></li></ul>'.format(c)
+                for c in counties).encode('utf-8'),
+        }
+        for county in counties:
+            routes[base + '/KY/{}/15261/'.format(county)] = (
+                b'<html><head><meta http-equiv="refresh" '
+                b'content="0;url=./30236/Web01/en/summary.html"></head></html>')
+        client = mock_client(routes_handler(routes))
+
+        async with client:
+            jurisdiction = AsyncJurisdiction(url=self.url, level='state', client=client)
+            subjurisdictions = await jurisdiction.get_subjurisdictions()
+
+        self.assertEqual([j.name for j in subjurisdictions], counties)
+        self.assertEqual(
+            subjurisdictions[0].url,
+            base + '/KY/Adair/15261/30236/en/summary.html')
+        self.assertEqual(subjurisdictions[0].level, 'county')
+
+    async def test_max_concurrency(self):
+        in_flight = []
+        peak = []
+
+        async def handler(request):
+            in_flight.append(request)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(request)
+            return httpx.Response(200, content=b'30235')
+
+        client = AsyncClient(max_concurrency=3, client=httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)))
+        async with client:
+            jurisdictions = [
+                AsyncJurisdiction(url=self.url, level='state', client=client)
+                for i in range(10)
+            ]
+            versions = await asyncio.gather(*[j.get_current_ver() for j in jurisdictions])
+
+        self.assertEqual(versions, ['30235'] * 10)
+        self.assertEqual(max(peak), 3)
+
+    async def test_probe_report_head_rejected(self):
+        report_url = 'https://results.enr.clarityelections.com/KY/15261/30235/reports/detailxml.zip'
+        methods = []
+
+        def handler(request):
+            methods.append(request.method)
+            if request.method == 'HEAD':
+                return httpx.Response(405)
+            self.assertEqual(request.headers['Range'], 'bytes=0-0')
+            return httpx.Response(206, content=b'P', headers={'Content-Range': 'bytes 0-0/1024'})
+
+        async with mock_client(handler) as client:
+            jurisdiction = AsyncJurisdiction(url=self.url, level='state', client=client)
+            result = await jurisdiction.probe_report('xml')
+            self.assertEqual(await jurisdiction.report_url('xml'), report_url)
+
+        self.assertTrue(result.exists)
+        self.assertEqual(result.size, 1024)
+        self.assertEqual(methods, ['HEAD', 'GET', 'HEAD', 'GET'])
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+
+    def make_client(self, handler, policy):
+        return AsyncClient(policy=policy, client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def test_policy(self):
+        url = 'https://results.enr.clarityelections.com/KY/15261/current_ver.txt'
+        timeouts = []
+        responses = [httpx.ConnectTimeout('timed out'), httpx.Response(503), httpx.Response(200, content=b'30235')]
+
+        def handler(request):
+            timeouts.append(request.extensions['timeout'])
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        async with self.make_client(handler, TransportPolicy(timeout=(5, 30), backoff=0)) as client:
+            r = await client.get(url)
+
+        self.assertEqual(r.text, '30235')
+        self.assertEqual(len(timeouts), 3)
+        self.assertEqual(timeouts[0]['connect'], 5)
+        self.assertEqual(timeouts[0]['read'], 30)
+
+    async def test_retries_exhausted(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectError('unreachable')
+
+        async with self.make_client(handler, TransportPolicy(retries=2, backoff=0)) as client:
+            with self.assertRaises(httpx.ConnectError):
+                await client.get('https://results.enr.clarityelections.com/KY/15261/current_ver.txt')
+        self.assertEqual(len(calls), 3)
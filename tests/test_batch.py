@@ -0,0 +1,55 @@
+import io
+import unittest
+import zipfile
+
+from clarify.batch import parse_many
+from clarify.parser import Parser
+
+
+def zip_report(path):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.write(path, 'detail.xml')
+    return buf.getvalue()
+
+
+class TestParseMany(unittest.TestCase):
+    paths = ['tests/data/precinct.xml', 'tests/data/county.xml']
+
+    def setUp(self):
+        self.expected = []
+        for path in self.paths:
+            er = Parser()
+            er.parse(path)
+            self.expected.append(er)
+
+    def assertReportsMatch(self, reports):
+        self.assertEqual(len(reports.parsers), len(self.expected))
+        for er, expected in zip(reports.parsers, self.expected):
+            self.assertEqual(er.region, expected.region)
+            self.assertEqual(er.contests, expected.contests)
+            self.assertEqual(list(er.results), expected.results)
+
+        self.assertEqual(reports.contests, [c for er in self.expected for c in er.contests])
+        self.assertEqual(len(reports.result_jurisdictions),
+                         sum(len(er.result_jurisdictions) for er in self.expected))
+        expected_results = [r for er in self.expected for r in er.results]
+        self.assertEqual(list(reports.results), expected_results)
+        self.assertEqual(len(reports.results), len(expected_results))
+        for i in (0, len(self.expected[0].results), -1):
+            self.assertEqual(reports.results[i], expected_results[i])
+        self.assertEqual(reports.results[1:-1], expected_results[1:-1])
+        self.assertEqual(reports.get_parser("AR").region, "AR")
+
+    def test_parse_many(self):
+        self.assertReportsMatch(parse_many(self.paths, workers=2))
+
+    def test_parse_many_zips(self):
+        self.assertReportsMatch(parse_many([zip_report(p) for p in self.paths], workers=2, stream=True))
+
+    def test_parse_many_in_process(self):
+        self.assertReportsMatch(parse_many(self.paths, workers=1))
+
+    def test_duplicate_region(self):
+        with self.assertRaises(ValueError):
+            parse_many([self.paths[0], self.paths[0]], workers=1)
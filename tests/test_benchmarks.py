@@ -0,0 +1,57 @@
+import io
+import tempfile
+import unittest
+
+from benchmarks.generate import generate_report, jurisdiction_names
+from benchmarks.run import run_benchmarks
+from clarify.parser import Parser
+
+
+class TestGenerateReport(unittest.TestCase):
+
+    def test_precinct_report(self):
+        f = io.BytesIO()
+        num_results = generate_report(f, counties=2, precincts=3, contests=4, choices=3, vote_types=2)
+
+        # Two no-choice vote types plus two vote types for each of three
+        # choices, each with a total and one result per precinct.
+        self.assertEqual(num_results, 4 * (2 + 3 * 2) * (2 * 3 + 1))
+
+        er = Parser()
+        er.parse(f.getvalue())
+        self.assertEqual(er.region, "ZZ")
+        self.assertEqual(len(er.result_jurisdictions), 6)
+        self.assertEqual(er.result_jurisdictions[0].level, 'precinct')
+        self.assertEqual(len(er.contests), 4)
+        self.assertEqual(len(er.contests[0].choices), 3)
+        self.assertEqual(len(er.results), num_results)
+
+        choice = er.contests[0].choices[0]
+        self.assertEqual(choice.total_votes, sum(r.votes for r in choice.results if r.jurisdiction is None))
+
+    def test_county_report(self):
+        f = io.BytesIO()
+        num_results = generate_report(f, counties=5, precincts=0, contests=2, choices=2, vote_types=1)
+
+        er = Parser()
+        er.parse(f.getvalue())
+        self.assertEqual([j.name for j in er.result_jurisdictions], jurisdiction_names(5, 0))
+        self.assertEqual(er.result_jurisdictions[0].level, 'county')
+        self.assertEqual(er.result_jurisdictions[0].precincts_participating, 20)
+        self.assertEqual(len(er.results), num_results)
+
+
+class TestRunBenchmarks(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            measurements = run_benchmarks(directory, names=['parse', 'parse_zip'],
+                                          counties=1, precincts=2, contests=1)
+
+        self.assertEqual([m['name'] for m in measurements], ['parse', 'parse_zip'])
+        for m in measurements:
+            self.assertGreater(m['seconds'], 0)
+            self.assertGreater(m['bytes'], 0)
+            # Two no-choice and four choice vote types, each with a total and
+            # one result per precinct.
+            self.assertEqual(m['results'], (2 + 4 * 4) * 3)
@@ -0,0 +1,185 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+
+import responses
+
+from clarify.cache import HTTPCache, TTLCache
+from clarify.jurisdiction import Jurisdiction, discovery_cache
+
+BASE_URL = 'https://results.enr.clarityelections.com/KY/15261'
+LAST_MODIFIED = 'Wed, 09 Nov 2016 14:03:21 GMT'
+
+
+class TestHTTPCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = HTTPCache(self.directory)
+        discovery_cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @responses.activate
+    def test_revalidates_with_etag(self):
+        url = BASE_URL + '/current_ver.txt'
+        responses.add(responses.GET, url, body='30235', status=200,
+                      headers={'ETag': '"abc"', 'Last-Modified': LAST_MODIFIED})
+
+        r = self.cache.get(url)
+        self.assertEqual(r.text, '30235')
+        self.assertFalse(r.from_cache)
+
+        responses.replace(responses.GET, url, status=304)
+        r = self.cache.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.text, '30235')
+        self.assertTrue(r.from_cache)
+
+        request = responses.calls[1].request
+        self.assertEqual(request.headers['If-None-Match'], '"abc"')
+        self.assertEqual(request.headers['If-Modified-Since'], LAST_MODIFIED)
+
+    @responses.activate
+    def test_changed_resource(self):
+        url = BASE_URL + '/current_ver.txt'
+        responses.add(responses.GET, url, body='30235', status=200, headers={'ETag': '"abc"'})
+        self.cache.get(url)
+
+        responses.replace(responses.GET, url, body='30236', status=200, headers={'ETag': '"def"'})
+        self.assertEqual(self.cache.get(url).text, '30236')
+        self.assertEqual(self.cache.get(url).text, '30236')
+        self.assertEqual(responses.calls[2].request.headers['If-None-Match'], '"def"')
+
+    @responses.activate
+    def test_errors_not_cached(self):
+        url = BASE_URL + '/current_ver.txt'
+        responses.add(responses.GET, url, status=404)
+
+        self.assertEqual(self.cache.get(url).status_code, 404)
+        self.assertIsNone(self.cache.get_path(url))
+        self.assertNotIn('If-None-Match', responses.calls[0].request.headers)
+
+    @responses.activate
+    def test_immutable(self):
+        url = BASE_URL + '/30235/reports/detailxml.zip'
+        responses.add(responses.GET, url, body=b'PK\x03\x04', status=200)
+
+        self.cache.get(url, immutable=True)
+        r = self.cache.get(url, immutable=True)
+
+        self.assertTrue(r.from_cache)
+        self.assertEqual(r.content, b'PK\x03\x04')
+        self.assertEqual(len(responses.calls), 1)
+        with open(self.cache.get_path(url), 'rb') as f:
+            self.assertEqual(f.read(), b'PK\x03\x04')
+
+        self.cache.clear()
+        self.assertIsNone(self.cache.get_path(url))
+
+    @responses.activate
+    def test_jurisdiction(self):
+        """
+        A Jurisdiction with a cache should revalidate the current version
+        and serve reports for the same version from the cache.
+        """
+        responses.add(responses.GET, BASE_URL + '/current_ver.txt', body='30235', status=200,
+                      headers={'ETag': '"abc"'})
+        report = io.BytesIO()
+        with zipfile.ZipFile(report, 'w') as archive:
+            archive.writestr('detail.xml', '<ElectionResult/>')
+        responses.add(responses.GET, BASE_URL + '/30235/reports/detailxml.zip', body=report.getvalue(),
+                      status=200)
+        url = BASE_URL + '/en/summary.html'
+        output_fn = os.path.join(self.directory, 'detailxml.zip')
+
+        for i in range(2):
+            jurisdiction = Jurisdiction(url=url, level='state', cache=self.cache)
+            self.assertEqual(jurisdiction.current_ver, '30235')
+            result = jurisdiction.download_report('xml', output_fn)
+            self.assertEqual(result.downloaded, len(report.getvalue()) if i == 0 else 0)
+            responses.replace(responses.GET, BASE_URL + '/current_ver.txt', status=304)
+            # Revalidate the version rather than using the remembered one
+            discovery_cache.clear()
+
+        self.assertEqual([call.request.url for call in responses.calls], [
+            BASE_URL + '/current_ver.txt',
+            BASE_URL + '/30235/reports/detailxml.zip',
+            BASE_URL + '/current_ver.txt',
+        ])
+        with open(output_fn, 'rb') as f:
+            self.assertEqual(f.read(), report.getvalue())
+
+    @responses.activate
+    def test_jurisdiction_unversioned_report(self):
+        """
+        Without a current version, the report URL has no version, so the
+        cached report should be revalidated.
+        """
+        responses.add(responses.GET, BASE_URL + '/current_ver.txt', status=404)
+        reports = []
+        for i in range(2):
+            report = io.BytesIO()
+            with zipfile.ZipFile(report, 'w') as archive:
+                archive.writestr('detail.xml', '<ElectionResult version="{}"/>'.format(i))
+            reports.append(report.getvalue())
+        report_url = BASE_URL + '/reports/detailxml.zip'
+        responses.add(responses.GET, report_url, body=reports[0], status=200, headers={'ETag': '"v1"'})
+        url = BASE_URL + '/en/summary.html'
+        output_fn = os.path.join(self.directory, 'detailxml.zip')
+
+        Jurisdiction(url=url, level='state', cache=self.cache).download_report('xml', output_fn)
+        responses.replace(responses.GET, report_url, status=304)
+        result = Jurisdiction(url=url, level='state', cache=self.cache).download_report('xml', output_fn)
+        self.assertEqual(result.downloaded, 0)
+        self.assertEqual(responses.calls[-1].request.headers['If-None-Match'], '"v1"')
+        with open(output_fn, 'rb') as f:
+            self.assertEqual(f.read(), reports[0])
+
+        responses.replace(responses.GET, report_url, body=reports[1], status=200, headers={'ETag': '"v2"'})
+        result = Jurisdiction(url=url, level='state', cache=self.cache).download_report('xml', output_fn)
+        self.assertEqual(result.downloaded, len(reports[1]))
+        with open(output_fn, 'rb') as f:
+            self.assertEqual(f.read(), reports[1])
+
+        # The new report's ETag is kept to revalidate it
+        responses.replace(responses.GET, report_url, status=304)
+        Jurisdiction(url=url, level='state', cache=self.cache).download_report('xml', output_fn)
+        self.assertEqual(responses.calls[-1].request.headers['If-None-Match'], '"v2"')
+        with open(output_fn, 'rb') as f:
+            self.assertEqual(f.read(), reports[1])
+
+    @responses.activate
+    def test_versioned_summary_immutable(self):
+        """
+        Summary pages for a version should be served from the cache
+        without being requested again.
+        """
+        responses.add(responses.GET, BASE_URL + '/current_ver.txt', body='30235', status=200)
+        summary_url = BASE_URL + '/30235/json/en/summary.json'
+        responses.add(responses.GET, summary_url, body='[]', status=200)
+        url = BASE_URL + '/en/summary.html'
+
+        for i in range(2):
+            self.assertEqual(Jurisdiction.get_latest_summary_url(url, cache=self.cache), summary_url)
+            discovery_cache.clear()
+
+        self.assertEqual([call.request.url for call in responses.calls], [
+            BASE_URL + '/current_ver.txt',
+            summary_url,
+            BASE_URL + '/current_ver.txt',
+        ])
+
+
+class TestTTLCache(TestCase):
+    def test_expiry(self):
+        cache = TTLCache(ttl=60)
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+
+        cache.ttl = 0
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('key', 'default'), 'default')
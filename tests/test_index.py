@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from clarify.index import build_index, get_index, get_index_path, read_index
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'detail.xml')
+        shutil.copy('tests/data/precinct.xml', self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_index(self):
+        index = build_index(self.path)
+
+        with open(self.path, 'rb') as f:
+            contents = f.read()
+        self.assertTrue(contents[:index.header_length].endswith(b'</VoterTurnout>'))
+        self.assertEqual(len(index.contests), 1)
+        contest = index.get_contest("4")
+        self.assertEqual(contest, index.get_contest("US Senator - REPUBLICAN"))
+        self.assertEqual(contest.text, "US Senator - REPUBLICAN")
+        element = contents[contest.offset:contest.offset + contest.length]
+        self.assertTrue(element.startswith(b'<Contest key="4"'))
+        self.assertTrue(element.endswith(b'</Contest>'))
+
+        self.assertEqual(read_index(get_index_path(self.path)), index)
+        with self.assertRaises(KeyError):
+            index.get_contest("5")
+
+    def test_state_report(self):
+        index = build_index('tests/data/county.xml', index_path=False)
+        self.assertFalse(os.path.exists(get_index_path('tests/data/county.xml')))
+        self.assertEqual([c.key for c in index.contests], ["100"])
+
+    def test_escaped_attributes(self):
+        with open(self.path, 'rb') as f:
+            contents = f.read()
+        with open(self.path, 'wb') as f:
+            f.write(contents.replace(b'text="US Senator - REPUBLICAN"',
+                                     b'text="Senator &amp; &quot;Rep&quot; &gt; 1"'))
+        index = build_index(self.path, index_path=False)
+        self.assertEqual(index.contests[0].text, 'Senator & "Rep" > 1')
+
+    def test_get_index(self):
+        index = get_index(self.path)
+        self.assertTrue(index.is_current(self.path))
+        self.assertEqual(get_index(self.path), index)
+
+        # A changed report is indexed again
+        with open(self.path, 'ab') as f:
+            f.write(b'\n')
+        self.assertFalse(index.is_current(self.path))
+        new_index = get_index(self.path)
+        self.assertEqual(new_index.size, index.size + 1)
+        self.assertEqual(read_index(get_index_path(self.path)), new_index)
+
+    def test_no_turnout(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'<ElectionResult><Region>AR</Region></ElectionResult>')
+        with self.assertRaises(ValueError):
+            build_index(self.path)
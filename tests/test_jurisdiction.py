@@ -10,7 +10,7 @@ if not hasattr(TestCase, "subTest"):
 
 import responses
 
-from clarify.jurisdiction import Jurisdiction
+from clarify.jurisdiction import Jurisdiction, discovery_cache
 
 COUNTIES_AR = [
     "Adair",
@@ -179,6 +179,10 @@ def mock_subjurisdiction_redirect_page_meta(page_id):
 
 
 class TestJurisdiction(TestCase):
+    def setUp(self):
+        # Don't reuse versions looked up by other tests
+        discovery_cache.clear()
+
     # Test the constructor
     def test_construct(self):
         """
@@ -311,6 +315,68 @@ class TestJurisdiction(TestCase):
             # And it matches the expected pattern
             self.assertIsNotNone(COUNTY_URL_RE.match(jurisdiction.url))
 
+    @responses.activate
+    def test_get_subjurisdictions_web02(self):
+        """
+        Subjurisdictions of a Web02 site should be built from its election
+        settings without any requests for each county.
+        """
+        base_url = 'https://results.enr.clarityelections.com/GA/63991'
+        counties = [
+            '{0}|{1}|{2}|11/9/2016 12:03:21 AM EST|16'.format(name, 64000 + i, 185000 + i)
+            for i, name in enumerate((COUNTIES_AR + [c + 'Two' for c in COUNTIES_AR])[:159])
+        ]
+        responses.add(responses.GET, base_url + '/current_ver.txt', body='184321')
+        responses.add(responses.GET, base_url + '/184321/json/en/summary.json', json={})
+        responses.add(responses.GET, base_url + '/184321/json/en/electionsettings.json',
+                      json={'settings': {'electiondetails': {'participatingcounties': counties}}})
+
+        jurisdiction = Jurisdiction(url=base_url + '/184321/Web02/en/summary.html', level='state')
+        subjurisdictions = jurisdiction.get_subjurisdictions()
+
+        self.assertEqual(len(subjurisdictions), 159)
+        self.assertEqual(subjurisdictions[1].name, 'Allen')
+        self.assertEqual(subjurisdictions[1].current_ver, '185001')
+        self.assertEqual(
+            subjurisdictions[1]._get_report_url('xml'),
+            'https://results.enr.clarityelections.com/GA/Allen/64001/185001/reports/detailxml.zip')
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_get_subjurisdictions_settings_fallback(self):
+        url = 'https://results.enr.clarityelections.com/NJ/Middlesex/46982/117336/Web01/en/summary.html'
+        responses.add(responses.GET, url.replace('summary.html', 'json/electionsettings.json'), status=404)
+        responses.add(responses.GET, url.replace('summary.html', 'json/en/electionsettings.json'),
+                      json={'settings': {'electiondetails': {'participatingcounties': [
+                          'Edison|46990|117400|11/9/2016 12:03:21 AM EST|16',
+                      ]}}})
+
+        jurisdiction = Jurisdiction(url=url, level='county')
+        subjurisdictions = jurisdiction.get_subjurisdictions()
+
+        self.assertEqual([j.name for j in subjurisdictions], ['Edison'])
+
+        # The layout that was found is tried first next time
+        responses.calls.reset()
+        jurisdiction.get_subjurisdictions()
+        self.assertEqual([c.request.url for c in responses.calls],
+                         [url.replace('summary.html', 'json/en/electionsettings.json')])
+
+    @responses.activate
+    def test_get_subjurisdictions_settings_sequential(self):
+        url = 'https://results.enr.clarityelections.com/NJ/Middlesex/46982/117336/Web01/en/summary.html'
+        responses.add(responses.GET, url.replace('summary.html', 'json/electionsettings.json'),
+                      json={'settings': {'electiondetails': {'participatingcounties': [
+                          'Edison|46990|117400|11/9/2016 12:03:21 AM EST|16',
+                      ]}}})
+
+        jurisdiction = Jurisdiction(url=url, level='county')
+        subjurisdictions = jurisdiction.get_subjurisdictions()
+
+        self.assertEqual([j.name for j in subjurisdictions], ['Edison'])
+        # The second candidate isn't requested once the first is found
+        self.assertEqual(len(responses.calls), 1)
+
     def test_scrape_subjurisdiction_summary_path(self):
         # Test HTML that uses JavaScript to redirect to the subjurisdiction
         # summary page.
@@ -435,6 +501,75 @@ class TestJurisdiction(TestCase):
         expected_url = 'https://results.enr.clarityelections.com/CO/53335/149144/reports/summary.zip'
         self.assertEqual(jurisdiction.summary_url, expected_url)
 
+    @responses.activate
+    def test_construct_is_lazy(self):
+        """
+        Constructing a Jurisdiction should not make any requests until the
+        summary URL or current version is needed, and then only once.
+        """
+        url = 'https://results.enr.clarityelections.com/CO/53335/en/summary.html'
+        responses.add(responses.GET, 'https://results.enr.clarityelections.com/CO/53335/current_ver.txt',
+                      body='149144', status=200, content_type='text/plain')
+        responses.add(responses.HEAD, 'https://results.enr.clarityelections.com/CO/53335/149144/reports/summary.zip',
+                      status=200)
+
+        jurisdiction = Jurisdiction(url=url, level='state')
+        self.assertEqual(len(responses.calls), 0)
+
+        self.assertEqual(jurisdiction.current_ver, '149144')
+        self.assertEqual(jurisdiction.current_ver, '149144')
+        self.assertEqual(len(responses.calls), 1)
+
+        expected_url = 'https://results.enr.clarityelections.com/CO/53335/149144/reports/summary.zip'
+        self.assertEqual(jurisdiction.summary_url, expected_url)
+        self.assertEqual(jurisdiction.summary_url, expected_url)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(responses.calls[1].request.method, 'HEAD')
+        self.assertEqual(
+            jurisdiction._get_report_url('xml'),
+            'https://results.enr.clarityelections.com/CO/53335/149144/reports/detailxml.zip')
+
+    @responses.activate
+    def test_get_current_ver_memoized(self):
+        """
+        The current version should be remembered across jurisdictions until
+        it expires.
+        """
+        responses.add(responses.GET, 'https://results.enr.clarityelections.com/CO/63746/current_ver.txt',
+                      body='184388', status=200, content_type='text/plain')
+        self.assertEqual(Jurisdiction.get_current_ver("https://results.enr.clarityelections.com/CO/63746/"), "184388")
+        jurisdiction = Jurisdiction(url='https://results.enr.clarityelections.com/CO/63746/en/summary.html',
+                                    level='state')
+        self.assertEqual(jurisdiction.current_ver, "184388")
+        self.assertEqual(len(responses.calls), 1)
+
+        responses.replace(responses.GET, 'https://results.enr.clarityelections.com/CO/63746/current_ver.txt',
+                          body='184389', status=200, content_type='text/plain')
+        ttl = discovery_cache.ttl
+        discovery_cache.ttl = 0
+        try:
+            self.assertEqual(Jurisdiction.get_current_ver("https://results.enr.clarityelections.com/CO/63746/"),
+                             "184389")
+        finally:
+            discovery_cache.ttl = ttl
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_get_latest_summary_url_memoized(self):
+        """
+        Which summary page an election uses should be remembered, so that
+        repeated lookups make no requests.
+        """
+        base_url = 'https://results.enr.clarityelections.com/AR/75879'
+        responses.add(responses.GET, base_url + '/current_ver.txt', body='208723', status=200)
+        responses.add(responses.GET, base_url + '/208723/json/en/summary.json', status=404)
+        responses.add(responses.GET, base_url + '/208723/Web01/en/summary.html', status=200)
+
+        for i in range(3):
+            self.assertEqual(Jurisdiction.get_latest_summary_url(base_url + '/'),
+                             base_url + '/208723/Web01/en/summary.html')
+        self.assertEqual(len(responses.calls), 3)
+
     @responses.activate
     def test_get_current_ver_state_web01_1st(self):
         """
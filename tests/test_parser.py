@@ -1,9 +1,18 @@
+import copy
 import datetime
+import io
+import os
+import pickle
+import shutil
+import tempfile
+import time
 import unittest
+import zipfile
 
 import lxml.etree
 
-from clarify.parser import (Parser, ResultJurisdiction)
+from clarify.parser import (ContestChanges, Parser, ReportHeader, ResultJurisdiction, ResultRow,
+                            ResultView)
 
 
 class TestParser(unittest.TestCase):
@@ -103,6 +112,58 @@ class TestParser(unittest.TestCase):
         self.assertEqual(parser._result_jurisdiction_lookup, { result_jurisdiction_name: result_jurisdiction })
 
 
+    def test_get_result_jurisdiction_missing(self):
+        parser = Parser()
+
+        with self.assertRaises(KeyError):
+            parser.get_result_jurisdiction("Missing")
+
+        self.assertEqual(parser._result_jurisdictions, [])
+
+    def test_get_result_jurisdiction_id(self):
+        parser = Parser()
+        for name in ["A", "B"]:
+            parser._get_or_create_result_jurisdiction(lxml.etree.Element("Precinct", {"name": name}))
+
+        self.assertEqual(parser.get_result_jurisdiction_id("A"), 0)
+        self.assertEqual(parser.get_result_jurisdiction_id("B"), 1)
+        self.assertEqual(parser.result_jurisdictions[parser.get_result_jurisdiction_id("B")].name, "B")
+        with self.assertRaises(KeyError):
+            parser.get_result_jurisdiction_id("C")
+
+    def test_unlisted_result_jurisdictions(self):
+        # Jurisdictions with results that aren't in the ``VoterTurnout``
+        # element are only created once.
+        with open('tests/data/precinct.xml') as f:
+            contents = f.read()
+        contents = contents.replace('<Precinct name="A105" votes=', '<Precinct name="Unlisted" votes=')
+
+        er = Parser()
+        er.parse(contents)
+
+        names = [j.name for j in er.result_jurisdictions]
+        self.assertEqual(len(names), len(set(names)))
+        unlisted = er.get_result_jurisdiction("Unlisted")
+        self.assertEqual(names.count("Unlisted"), 1)
+        self.assertEqual(unlisted.level, "precinct")
+        self.assertIsNone(unlisted.ballots_cast)
+        self.assertEqual(len(unlisted.results), 7)
+        self.assertEqual(len(er.get_result_jurisdiction("A105").results), 0)
+
+    def test_result_slots(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+        result = er.get_result_jurisdiction("A105").results[0]
+
+        self.assertFalse(hasattr(result, '__dict__'))
+        with self.assertRaises(AttributeError):
+            result.extra = 1
+        contest, vote_type, jurisdiction, votes, choice = result
+        self.assertIs(jurisdiction, result.jurisdiction)
+        self.assertEqual(result._replace(votes=0).votes, 0)
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
+
+
 class TestPrecinctParser(unittest.TestCase):
     def test_parse(self):
         num_precincts = 33
@@ -242,3 +303,589 @@ class TestCountyParser(unittest.TestCase):
         self.assertEqual(contest_choice.key, "001")
         self.assertEqual(contest_choice.party, "REP")
         self.assertEqual(contest_choice.total_votes, 477734)
+
+
+class TestStreamingParser(unittest.TestCase):
+
+    def assertParsersEqual(self, expected, actual):
+        self.assertEqual(actual.timestamp, expected.timestamp)
+        self.assertEqual(actual.election_name, expected.election_name)
+        self.assertEqual(actual.election_date, expected.election_date)
+        self.assertEqual(actual.region, expected.region)
+        self.assertEqual(actual.total_voters, expected.total_voters)
+        self.assertEqual(actual.ballots_cast, expected.ballots_cast)
+        self.assertEqual(actual.voter_turnout, expected.voter_turnout)
+        self.assertEqual(actual.result_jurisdictions, expected.result_jurisdictions)
+        self.assertEqual(actual.contests, expected.contests)
+        self.assertEqual(actual.results, expected.results)
+        for expected_contest, contest in zip(expected.contests, actual.contests):
+            self.assertEqual(contest.choices, expected_contest.choices)
+
+    def test_parse_precinct(self):
+        expected = Parser()
+        expected.parse('tests/data/precinct.xml')
+
+        er = Parser()
+        er.parse('tests/data/precinct.xml', stream=True)
+
+        self.assertParsersEqual(expected, er)
+        self.assertEqual(er.get_contest("US Senator - REPUBLICAN").key, "4")
+        self.assertEqual(len(er.get_result_jurisdiction("A105").results), 7)
+
+    def test_parse_county(self):
+        expected = Parser()
+        expected.parse('tests/data/county.xml')
+
+        er = Parser()
+        er.parse('tests/data/county.xml', stream=True)
+
+        self.assertParsersEqual(expected, er)
+
+    def test_parse_file_object(self):
+        expected = Parser()
+        expected.parse('tests/data/county.xml')
+
+        er = Parser()
+        with open('tests/data/county.xml', 'rb') as f:
+            er.parse(f, stream=True)
+
+        self.assertParsersEqual(expected, er)
+
+    def test_parse_string(self):
+        with open('tests/data/precinct.xml') as f:
+            contents = f.read()
+
+        expected = Parser()
+        expected.parse(contents)
+
+        er = Parser()
+        er.parse(contents, stream=True)
+
+        self.assertParsersEqual(expected, er)
+
+
+class TestContestFilter(unittest.TestCase):
+
+    def setUp(self):
+        # Contests with keys "4", "4-1" and "4-2"
+        self.report = scale_report('tests/data/precinct.xml', 3)
+
+    def assertFiltered(self, er, keys):
+        self.assertEqual([c.key for c in er.contests], keys)
+        for result in er.results:
+            self.assertIn(result.contest.key, keys)
+        for jurisdiction in er.result_jurisdictions:
+            for result in jurisdiction.results:
+                self.assertIn(result.contest.key, keys)
+
+    def test_filter(self):
+        expected = Parser()
+        expected.parse(self.report)
+        contest_1 = expected.get_contest("US Senator - REPUBLICAN 1")
+
+        filters = [
+            ["4-1"],
+            "US Senator - REPUBLICAN 1",
+            ["US Senator - REPUBLICAN 1", "Not a contest"],
+            lambda attrib: attrib['key'] == "4-1",
+        ]
+        for contests in filters:
+            for stream in (False, True):
+                with self.subTest(contests=contests, stream=stream):
+                    er = Parser()
+                    er.parse(self.report, stream=stream, contests=contests)
+                    self.assertFiltered(er, ["4-1"])
+                    contest = er.get_contest("US Senator - REPUBLICAN 1")
+                    self.assertEqual(contest, contest_1)
+                    self.assertEqual(contest.results, contest_1.results)
+                    self.assertEqual(er.result_jurisdictions, expected.result_jurisdictions)
+
+    def test_filter_none_match(self):
+        for stream in (False, True):
+            er = Parser()
+            er.parse(self.report, stream=stream, contests=[])
+            self.assertEqual(er.contests, [])
+            self.assertEqual(er.results, [])
+            self.assertEqual(er.region, 'Greenup')
+
+    def test_filter_columnar(self):
+        er = Parser(columnar=True)
+        er.parse(self.report, stream=True, contests=["4", "4-2"])
+        self.assertFiltered(er, ["4", "4-2"])
+
+    def test_predicate_attributes(self):
+        seen = []
+
+        def contest_filter(attrib):
+            seen.append(dict(attrib))
+            return False
+
+        er = Parser()
+        er.parse(self.report, stream=True, contests=contest_filter)
+        self.assertEqual(er.contests, [])
+        self.assertEqual([a['key'] for a in seen], ["4", "4-1", "4-2"])
+        self.assertEqual(seen[0]['voteFor'], "1")
+
+
+class TestTotalsParser(unittest.TestCase):
+
+    def test_totals(self):
+        for path in ('tests/data/precinct.xml', 'tests/data/county.xml'):
+            full = Parser()
+            full.parse(path)
+            totals = [r for r in full.results if r.jurisdiction is None]
+
+            for stream in (False, True):
+                for columnar in (False, True):
+                    with self.subTest(path=path, stream=stream, columnar=columnar):
+                        er = Parser(columnar=columnar)
+                        er.parse(path, stream=stream, detail_level='totals')
+                        self.assertEqual(er.detail_level, 'totals')
+                        self.assertEqual(list(er.results), totals)
+                        self.assertEqual(er.contests, full.contests)
+                        self.assertEqual(er.result_jurisdictions, full.result_jurisdictions)
+                        for contest, full_contest in zip(er.contests, full.contests):
+                            self.assertEqual(contest.choices, full_contest.choices)
+
+    def test_invalid_detail_level(self):
+        with self.assertRaises(ValueError):
+            Parser().parse('tests/data/precinct.xml', detail_level='precinct')
+
+
+class TestLoadContest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'detail.xml')
+        with open(self.path, 'wb') as f:
+            f.write(scale_report('tests/data/precinct.xml', 3))
+        self.expected = Parser()
+        self.expected.parse(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_contest(self):
+        for columnar in (False, True):
+            for key in ("4-1", "US Senator - REPUBLICAN 1"):
+                with self.subTest(columnar=columnar, key=key):
+                    er = Parser(columnar=columnar)
+                    contest = er.load_contest(self.path, key)
+                    expected = self.expected.get_contest("US Senator - REPUBLICAN 1")
+                    self.assertEqual(contest, expected)
+                    self.assertEqual(contest.choices, expected.choices)
+                    self.assertEqual(list(contest.results), expected.results)
+                    self.assertEqual(er.contests, [contest])
+                    self.assertEqual(er.region, self.expected.region)
+                    self.assertEqual(er.result_jurisdictions, self.expected.result_jurisdictions)
+        self.assertTrue(os.path.exists(self.path + '.index.json'))
+
+    def test_missing_contest(self):
+        with self.assertRaises(KeyError):
+            Parser().load_contest(self.path, "5")
+
+
+class TestIterResults(unittest.TestCase):
+
+    def assertRowsMatchResults(self, path):
+        expected = Parser()
+        expected.parse(path)
+
+        er = Parser()
+        rows = list(er.iter_results(path))
+
+        self.assertEqual(er.timestamp, expected.timestamp)
+        self.assertEqual(er.region, expected.region)
+        self.assertEqual(len(rows), len(expected.results))
+        for row, result in zip(rows, expected.results):
+            self.assertIsInstance(row, ResultRow)
+            self.assertEqual(row.contest, result.contest.text)
+            self.assertEqual(row.vote_type, result.vote_type)
+            self.assertEqual(row.votes, result.votes)
+            if result.choice is None:
+                self.assertIsNone(row.choice)
+                self.assertIsNone(row.party)
+            else:
+                self.assertEqual(row.choice, result.choice.text)
+                self.assertEqual(row.party, result.choice.party)
+            if result.jurisdiction is None:
+                self.assertIsNone(row.jurisdiction)
+            else:
+                self.assertEqual(row.jurisdiction, result.jurisdiction.name)
+
+    def test_iter_results_precinct(self):
+        self.assertRowsMatchResults('tests/data/precinct.xml')
+
+    def test_iter_results_county(self):
+        self.assertRowsMatchResults('tests/data/county.xml')
+
+    def test_iter_results_is_lazy(self):
+        er = Parser()
+        rows = er.iter_results('tests/data/county.xml')
+        row = next(rows)
+        self.assertEqual(row, ResultRow("U.S. Senate", "Tom Cotton", "REP", "Election Day", None, row.votes))
+        self.assertEqual(er.region, "AR")
+        self.assertEqual(er.contests, [])
+
+
+class TestColumnarParser(unittest.TestCase):
+
+    def assertColumnarMatches(self, path, **kwargs):
+        expected = Parser()
+        expected.parse(path)
+
+        er = Parser(columnar=True)
+        er.parse(path, **kwargs)
+
+        self.assertIsInstance(er.results, ResultView)
+        self.assertEqual(len(er.results), len(expected.results))
+        self.assertEqual(list(er.results), expected.results)
+        self.assertEqual(er.result_jurisdictions, expected.result_jurisdictions)
+        for expected_contest, contest in zip(expected.contests, er.contests):
+            self.assertEqual(contest, expected_contest)
+            self.assertEqual(list(contest.results), expected_contest.results)
+            for expected_choice, choice in zip(expected_contest.choices, contest.choices):
+                self.assertEqual(list(choice.results), expected_choice.results)
+        for expected_jurisdiction, jurisdiction in zip(expected.result_jurisdictions, er.result_jurisdictions):
+            self.assertEqual(list(jurisdiction.results), expected_jurisdiction.results)
+
+        return er
+
+    def test_parse_precinct(self):
+        self.assertColumnarMatches('tests/data/precinct.xml')
+
+    def test_parse_county(self):
+        er = self.assertColumnarMatches('tests/data/county.xml')
+
+        store = er._store
+        self.assertEqual(len(store), len(er.results))
+        self.assertEqual(len(store.contests), 1)
+        self.assertEqual(len(store.vote_types), 4)
+        self.assertEqual(store.votes.typecode, 'q')
+
+    def test_parse_stream(self):
+        self.assertColumnarMatches('tests/data/county.xml', stream=True)
+
+    def test_results_are_not_backlinked(self):
+        er = Parser(columnar=True)
+        er.parse('tests/data/precinct.xml')
+
+        jurisdiction = er.get_result_jurisdiction("A105")
+        num_results = len(jurisdiction.results)
+        self.assertEqual(num_results, 7)
+        # Materializing results doesn't grow the jurisdiction's results
+        list(er.results)
+        self.assertEqual(len(jurisdiction.results), num_results)
+        self.assertEqual(er.results[0:2], list(er.results)[0:2])
+
+
+class TestParseZip(unittest.TestCase):
+
+    def make_zip(self, members):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as archive:
+            for name, path in members.items():
+                archive.write(path, name)
+        return buf.getvalue()
+
+    def setUp(self):
+        self.expected = Parser()
+        self.expected.parse('tests/data/county.xml')
+
+    def assertParsed(self, er):
+        self.assertEqual(er.region, self.expected.region)
+        self.assertEqual(er.contests, self.expected.contests)
+        self.assertEqual(er.results, self.expected.results)
+
+    def test_parse_zip_path(self):
+        contents = self.make_zip({'detail.xml': 'tests/data/county.xml'})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            zip_path = os.path.join(tmpdir, 'detailxml.zip')
+            with open(zip_path, 'wb') as f:
+                f.write(contents)
+
+            er = Parser()
+            er.parse_zip(zip_path)
+            self.assertParsed(er)
+
+    def test_parse_zip_bytes(self):
+        er = Parser()
+        er.parse_zip(self.make_zip({'detail.xml': 'tests/data/county.xml'}))
+        self.assertParsed(er)
+
+    def test_parse_zip_file_object(self):
+        contents = self.make_zip({'detail.xml': 'tests/data/county.xml'})
+        er = Parser()
+        er.parse_zip(io.BytesIO(contents), stream=True)
+        self.assertParsed(er)
+
+    def test_parse_zip_member_name(self):
+        contents = self.make_zip({
+            'readme.txt': 'tests/data/select-county__KY__50972__131636.html',
+            'AR_detail.xml': 'tests/data/county.xml',
+        })
+        er = Parser()
+        er.parse_zip(contents)
+        self.assertParsed(er)
+
+    def test_parse_zip_ambiguous(self):
+        contents = self.make_zip({
+            'county.xml': 'tests/data/county.xml',
+            'precinct.xml': 'tests/data/precinct.xml',
+        })
+        with self.assertRaises(ValueError):
+            Parser().parse_zip(contents)
+
+    def test_parse_bytes(self):
+        with open('tests/data/county.xml', 'rb') as f:
+            contents = f.read()
+        er = Parser()
+        er.parse(contents)
+        self.assertParsed(er)
+
+
+class TestPeek(unittest.TestCase):
+
+    def assertPeeked(self, header, path):
+        er = Parser()
+        er.parse(path)
+        self.assertEqual(header, ReportHeader(
+            timestamp=er.timestamp,
+            election_name=er.election_name,
+            election_date=er.election_date,
+            region=er.region,
+            total_voters=er.total_voters,
+            ballots_cast=er.ballots_cast,
+            voter_turnout=er.voter_turnout,
+        ))
+
+    def test_peek(self):
+        for path in ('tests/data/county.xml', 'tests/data/precinct.xml'):
+            with self.subTest(path=path):
+                self.assertPeeked(Parser.peek(path), path)
+
+    def test_peek_stops_after_header(self):
+        # Anything after the turnout element's opening tag, even invalid
+        # XML, should not be read
+        with open('tests/data/precinct.xml', 'rb') as f:
+            contents = f.read()
+        end = contents.index(b'>', contents.index(b'<VoterTurnout')) + 1
+        header = Parser.peek(contents[:end] + b'<<< not XML' * 10000)
+        self.assertPeeked(header, 'tests/data/precinct.xml')
+
+    def test_peek_zip(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as archive:
+            archive.write('tests/data/county.xml', 'detail.xml')
+        header = Parser.peek_zip(buf.getvalue())
+        self.assertPeeked(header, 'tests/data/county.xml')
+        self.assertEqual(header.region, 'AR')
+        self.assertEqual(header.total_voters, 1690577)
+
+    def test_peek_no_turnout(self):
+        with self.assertRaises(ValueError):
+            Parser.peek('<ElectionResult><Region>AR</Region></ElectionResult>')
+
+
+def scale_report(path, factor):
+    """
+    Build a larger report by repeating each ``Contest`` element of a fixture
+
+    Returns:
+        Bytes containing the XML of the scaled report.
+
+    """
+    tree = lxml.etree.parse(path)
+    root = tree.getroot()
+    contest_els = root.findall('Contest')
+    for i in range(1, factor):
+        for contest_el in contest_els:
+            new_el = copy.deepcopy(contest_el)
+            new_el.set('key', "{}-{}".format(contest_el.get('key'), i))
+            new_el.set('text', "{} {}".format(contest_el.get('text'), i))
+            root.append(new_el)
+    return lxml.etree.tostring(tree)
+
+
+class TestScaledParser(unittest.TestCase):
+    fixtures = ['tests/data/precinct.xml', 'tests/data/county.xml']
+
+    def test_parse_scaled(self):
+        for path in self.fixtures:
+            base = Parser()
+            base.parse(path)
+
+            er = Parser()
+            er.parse(scale_report(path, 5))
+
+            self.assertEqual(len(er.contests), 5 * len(base.contests))
+            self.assertEqual(len(er.results), 5 * len(base.results))
+            self.assertEqual(er.result_jurisdictions, base.result_jurisdictions)
+
+    @unittest.skipUnless(os.environ.get('CLARIFY_BENCHMARK'), "set CLARIFY_BENCHMARK to run benchmarks")
+    def test_benchmark_per_cell(self):
+        factor = int(os.environ.get('CLARIFY_BENCHMARK_FACTOR', 200))
+        for path in self.fixtures:
+            report = scale_report(path, factor)
+            timings = []
+            for _ in range(3):
+                er = Parser()
+                start = time.perf_counter()
+                er.parse(report)
+                timings.append(time.perf_counter() - start)
+            num_results = len(er.results)
+            print("\n{}: {} results, {:.2f} us/result".format(
+                path, num_results, min(timings) / num_results * 1e6))
+
+
+class TestPickleColumnarParser(unittest.TestCase):
+
+    def test_pickle(self):
+        expected = Parser(columnar=True)
+        expected.parse('tests/data/precinct.xml')
+
+        er = pickle.loads(pickle.dumps(expected))
+
+        self.assertEqual(er.region, expected.region)
+        self.assertEqual(er.contests, expected.contests)
+        self.assertEqual(er.result_jurisdictions, expected.result_jurisdictions)
+        self.assertEqual(list(er.results), list(expected.results))
+        contest = er.get_contest("US Senator - REPUBLICAN")
+        self.assertEqual(list(contest.results), list(expected.contests[0].results))
+        self.assertEqual(contest.choices[0].contest, contest)
+        self.assertIs(contest.choices[0].results[0].contest, contest)
+        self.assertEqual(list(contest.choices[2].results), list(expected.contests[0].choices[2].results))
+        self.assertEqual(len(er.get_result_jurisdiction("A105").results), 7)
+
+
+class TestUpdateParser(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/data/precinct.xml') as f:
+            self.contents = f.read()
+        # Add a second contest, so that one can change while the other
+        # doesn't.
+        start = self.contents.index('<Contest ')
+        end = self.contents.index('</Contest>') + len('</Contest>')
+        contest = self.contents[start:end]
+        second = contest.replace('key="4"', 'key="5"').replace('US Senator - REPUBLICAN', 'US Senator - DEMOCRAT')
+        self.contents = self.contents[:end] + second + self.contents[end:]
+
+    def assertMatchesParse(self, er, contents):
+        expected = Parser()
+        expected.parse(contents)
+
+        self.assertEqual(er.contests, expected.contests)
+        self.assertEqual(er.results, expected.results)
+        self.assertEqual(er.result_jurisdictions, expected.result_jurisdictions)
+        for expected_jurisdiction in expected.result_jurisdictions:
+            jurisdiction = er.get_result_jurisdiction(expected_jurisdiction.name)
+            self.assertEqual(jurisdiction.results, expected_jurisdiction.results)
+            for result in jurisdiction.results:
+                self.assertIs(result.jurisdiction, jurisdiction)
+        for result in er.results:
+            if result.jurisdiction is not None:
+                self.assertIs(result.jurisdiction, er.get_result_jurisdiction(result.jurisdiction.name))
+
+    def test_first_update(self):
+        er = Parser()
+        changes = er.update(self.contents)
+
+        self.assertEqual(changes, ContestChanges(added=["4", "5"], changed=[], removed=[], unchanged=[]))
+        self.assertMatchesParse(er, self.contents)
+
+    def test_update_unchanged(self):
+        er = Parser()
+        er.update(self.contents)
+        contests = list(er.contests)
+
+        changes = er.update(self.contents)
+
+        self.assertEqual(changes, ContestChanges(added=[], changed=[], removed=[], unchanged=["4", "5"]))
+        for contest, old_contest in zip(er.contests, contests):
+            self.assertIs(contest, old_contest)
+        self.assertMatchesParse(er, self.contents)
+
+    def test_update_after_parse(self):
+        er = Parser(track_changes=True)
+        er.parse(self.contents)
+        contests = list(er.contests)
+
+        changes = er.update(self.contents)
+
+        self.assertEqual(changes, ContestChanges(added=[], changed=[], removed=[], unchanged=["4", "5"]))
+        for contest, old_contest in zip(er.contests, contests):
+            self.assertIs(contest, old_contest)
+        self.assertMatchesParse(er, self.contents)
+
+    def test_update_parse_update(self):
+        # Contests parsed by ``parse`` replace those of the earlier update
+        index = self.contents.rindex('<Precinct name="A105" votes="')
+        new_contents = self.contents[:index] + self.contents[index:].replace('votes="', 'votes="1', 1)
+        for track_changes in (False, True):
+            with self.subTest(track_changes=track_changes):
+                er = Parser(track_changes=track_changes)
+                er.update(self.contents)
+                er.parse(new_contents)
+
+                changes = er.update(self.contents)
+
+                # Without hashes from ``parse``, every contest is rebuilt
+                expected = ["5"] if track_changes else ["4", "5"]
+                self.assertEqual(changes.changed, expected)
+                self.assertMatchesParse(er, self.contents)
+
+    def test_update_keeps_contest_filter(self):
+        er = Parser()
+        er.parse(self.contents, contests=["5"])
+
+        changes = er.update(self.contents)
+
+        self.assertEqual(changes.added, [])
+        self.assertEqual(changes.removed, [])
+        self.assertEqual([c.key for c in er.contests], ["5"])
+
+    def test_update_changed_contest(self):
+        er = Parser()
+        er.update(self.contents)
+        unchanged_contest = er.get_contest('US Senator - REPUBLICAN')
+
+        # Change the votes for a precinct in the second contest only
+        index = self.contents.rindex('<Precinct name="A105" votes="')
+        new_contents = self.contents[:index] + self.contents[index:].replace('votes="', 'votes="1', 1)
+        changes = er.update(new_contents)
+
+        self.assertEqual(changes, ContestChanges(added=[], changed=["5"], removed=[], unchanged=["4"]))
+        self.assertIs(er.get_contest('US Senator - REPUBLICAN'), unchanged_contest)
+        self.assertMatchesParse(er, new_contents)
+
+    def test_update_changed_jurisdiction(self):
+        er = Parser()
+        er.update(self.contents)
+        old_jurisdiction = er.get_result_jurisdiction("A105")
+
+        new_contents = self.contents.replace('ballotsCast="171"', 'ballotsCast="180"')
+        changes = er.update(new_contents)
+
+        self.assertEqual(changes.unchanged, ["4", "5"])
+        jurisdiction = er.get_result_jurisdiction("A105")
+        self.assertIsNot(jurisdiction, old_jurisdiction)
+        self.assertEqual(jurisdiction.ballots_cast, 180)
+        self.assertEqual(len(jurisdiction.results), 14)
+        self.assertMatchesParse(er, new_contents)
+
+    def test_update_removed_contest(self):
+        er = Parser()
+        er.update(self.contents)
+
+        start = self.contents.rindex('<Contest ')
+        end = self.contents.rindex('</Contest>') + len('</Contest>')
+        new_contents = self.contents[:start] + self.contents[end:]
+        changes = er.update(new_contents)
+
+        self.assertEqual(changes, ContestChanges(added=[], changed=[], removed=["5"], unchanged=["4"]))
+        self.assertMatchesParse(er, new_contents)
+
+    def test_update_columnar(self):
+        with self.assertRaises(ValueError):
+            Parser(columnar=True).update(self.contents)
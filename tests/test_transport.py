@@ -0,0 +1,474 @@
+import concurrent.futures
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from unittest import TestCase, mock
+
+import requests
+import responses
+
+from clarify.jurisdiction import Jurisdiction
+from clarify.transport import (UA_HEADER, DownloadInterruptedError, ProbeResult, Transport, TransportPolicy,
+                               download, get_default_transport, probe)
+
+REPORT_URL = 'https://results.enr.clarityelections.com/KY/15261/30235/reports/detailxml.zip'
+LAST_MODIFIED = 'Wed, 09 Nov 2016 14:03:21 GMT'
+
+
+class TestProbe(TestCase):
+    @responses.activate
+    def test_head(self):
+        responses.add(responses.HEAD, REPORT_URL, status=200,
+                      headers={'Content-Length': '5242880', 'Last-Modified': LAST_MODIFIED})
+
+        result = probe(REPORT_URL)
+
+        self.assertEqual(result, ProbeResult(
+            url=REPORT_URL,
+            exists=True,
+            status_code=200,
+            size=5242880,
+            last_modified=datetime.datetime(2016, 11, 9, 14, 3, 21, tzinfo=datetime.timezone.utc),
+        ))
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_missing(self):
+        responses.add(responses.HEAD, REPORT_URL, status=404)
+
+        result = probe(REPORT_URL)
+
+        self.assertFalse(result.exists)
+        self.assertEqual(result.status_code, 404)
+        self.assertIsNone(result.size)
+        self.assertIsNone(result.last_modified)
+
+    @responses.activate
+    def test_head_rejected(self):
+        """
+        When a host rejects HEAD requests, a single byte should be requested
+        instead and the size taken from the Content-Range header.
+        """
+        responses.add(responses.HEAD, REPORT_URL, status=405)
+        responses.add(responses.GET, REPORT_URL, status=206, body=b'P',
+                      headers={'Content-Range': 'bytes 0-0/5242880', 'Last-Modified': LAST_MODIFIED})
+
+        result = probe(REPORT_URL)
+
+        self.assertTrue(result.exists)
+        self.assertEqual(result.status_code, 206)
+        self.assertEqual(result.size, 5242880)
+        self.assertEqual(result.last_modified.year, 2016)
+        self.assertEqual(responses.calls[1].request.headers['Range'], 'bytes=0-0')
+
+    @responses.activate
+    def test_head_rejected_range_ignored(self):
+        responses.add(responses.HEAD, REPORT_URL, status=501)
+        responses.add(responses.GET, REPORT_URL, status=200, body=b'PK' * 10,
+                      headers={'Content-Length': '20'})
+
+        result = probe(REPORT_URL)
+
+        self.assertTrue(result.exists)
+        self.assertEqual(result.size, 20)
+        self.assertIsNone(result.last_modified)
+
+    @responses.activate
+    def test_report_url(self):
+        responses.add(responses.HEAD, REPORT_URL, status=200)
+        responses.add(responses.HEAD, REPORT_URL.replace('xml', 'xls'), status=404)
+
+        jurisdiction = Jurisdiction(
+            url='https://results.enr.clarityelections.com/KY/15261/30235/en/summary.html',
+            level='state')
+
+        self.assertEqual(jurisdiction.report_url('xml'), REPORT_URL)
+        self.assertIsNone(jurisdiction.report_url('xls'))
+        for call in responses.calls:
+            self.assertEqual(call.request.method, 'HEAD')
+
+
+class TestDownload(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output_fn = os.path.join(self.directory, 'detailxml.zip')
+        report = io.BytesIO()
+        with zipfile.ZipFile(report, 'w') as archive:
+            archive.writestr('detail.xml', '<ElectionResult/>' * 1000)
+        self.report = report.getvalue()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_output(self):
+        with open(self.output_fn, 'rb') as f:
+            return f.read()
+
+    @responses.activate
+    def test_download(self):
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200)
+
+        result = download(REPORT_URL, self.output_fn, chunk_size=100, verify_zip=True)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertEqual(result.path, self.output_fn)
+        self.assertEqual(result.size, len(self.report))
+        self.assertEqual(result.downloaded, len(self.report))
+        self.assertFalse(result.resumed)
+        self.assertFalse(os.path.exists(self.output_fn + '.part'))
+
+    def write_partial(self, contents, url=REPORT_URL, validator='"v1"'):
+        with open(self.output_fn + '.part', 'wb') as f:
+            f.write(contents)
+        with open(self.output_fn + '.part.json', 'w') as f:
+            json.dump({'url': url, 'validator': validator}, f)
+
+    def assertNoPartial(self):
+        self.assertFalse(os.path.exists(self.output_fn + '.part'))
+        self.assertFalse(os.path.exists(self.output_fn + '.part.json'))
+
+    @responses.activate
+    def test_resume(self):
+        offset = 100
+        self.write_partial(self.report[:offset])
+        responses.add(responses.GET, REPORT_URL, body=self.report[offset:], status=206,
+                      headers={'ETag': '"v1"'})
+
+        result = download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(responses.calls[0].request.headers['Range'], 'bytes=100-')
+        self.assertEqual(responses.calls[0].request.headers['If-Range'], '"v1"')
+        self.assertEqual(self.read_output(), self.report)
+        self.assertEqual(result.downloaded, len(self.report) - offset)
+        self.assertTrue(result.resumed)
+        self.assertNoPartial()
+
+    @responses.activate
+    def test_interrupted_download_saves_validator(self):
+        def iter_content(chunk_size):
+            yield self.report[:100]
+            raise requests.exceptions.ChunkedEncodingError()
+
+        response = mock.Mock(status_code=200, iter_content=iter_content,
+                             headers={'ETag': 'W/"weak"', 'Last-Modified': LAST_MODIFIED})
+        session = mock.Mock(get=mock.Mock(return_value=response))
+        with self.assertRaises(DownloadInterruptedError):
+            download(REPORT_URL, self.output_fn, session=session)
+
+        # Weak ETags can't be used with If-Range, so the date is used
+        responses.add(responses.GET, REPORT_URL, body=self.report[100:], status=206)
+        result = download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(responses.calls[0].request.headers['If-Range'], LAST_MODIFIED)
+        self.assertEqual(self.read_output(), self.report)
+        self.assertTrue(result.resumed)
+
+    @responses.activate
+    def test_resume_changed_file(self):
+        # The host sends the whole of the new file when If-Range doesn't match
+        self.write_partial(b'PK' * 100, validator='"old"')
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200, headers={'ETag': '"v2"'})
+
+        result = download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertFalse(result.resumed)
+        self.assertNoPartial()
+
+    @responses.activate
+    def test_resume_changed_file_if_range_ignored(self):
+        self.write_partial(b'PK' * 100, validator='"old"')
+        responses.add(responses.GET, REPORT_URL, body=self.report[200:], status=206, headers={'ETag': '"v2"'})
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200, headers={'ETag': '"v2"'})
+
+        result = download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertFalse(result.resumed)
+        self.assertNotIn('Range', responses.calls[1].request.headers)
+
+    @responses.activate
+    def test_partial_from_other_url(self):
+        # A partial report for another version isn't resumed
+        self.write_partial(b'PK' * 100, url=REPORT_URL.replace('30235', '30234'))
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200)
+
+        download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertNotIn('Range', responses.calls[0].request.headers)
+        self.assertEqual(self.read_output(), self.report)
+
+    @responses.activate
+    def test_resume_complete(self):
+        self.write_partial(self.report)
+        responses.add(responses.GET, REPORT_URL, status=416,
+                      headers={'Content-Range': 'bytes */{}'.format(len(self.report))})
+
+        result = download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertEqual(result.downloaded, 0)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_resume_complete_size_changed(self):
+        self.write_partial(self.report + b'old')
+        responses.add(responses.GET, REPORT_URL, status=416,
+                      headers={'Content-Range': 'bytes */{}'.format(len(self.report))})
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200)
+
+        download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_resume_range_ignored(self):
+        self.write_partial(b'PK')
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200)
+
+        result = download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertFalse(result.resumed)
+
+    @responses.activate
+    def test_partial_without_validator(self):
+        with open(self.output_fn + '.part', 'wb') as f:
+            f.write(b'PK')
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200)
+
+        download(REPORT_URL, self.output_fn, verify_zip=True)
+
+        self.assertNotIn('Range', responses.calls[0].request.headers)
+        self.assertEqual(self.read_output(), self.report)
+
+    @responses.activate
+    def test_http_error(self):
+        responses.add(responses.GET, REPORT_URL, body='Not Found', status=404)
+
+        with self.assertRaises(requests.HTTPError):
+            download(REPORT_URL, self.output_fn)
+        self.assertFalse(os.path.exists(self.output_fn))
+        self.assertFalse(os.path.exists(self.output_fn + '.part'))
+
+    @responses.activate
+    def test_not_modified(self):
+        responses.add(responses.GET, REPORT_URL, status=304)
+
+        result = download(REPORT_URL, self.output_fn, headers={'If-None-Match': '"v1"'})
+
+        self.assertIsNone(result)
+        self.assertEqual(responses.calls[0].request.headers['If-None-Match'], '"v1"')
+        self.assertFalse(os.path.exists(self.output_fn))
+        self.assertNoPartial()
+
+    @responses.activate
+    def test_invalid_zip(self):
+        responses.add(responses.GET, REPORT_URL, body=self.report[:-50], status=200)
+
+        with self.assertRaises(zipfile.BadZipFile):
+            download(REPORT_URL, self.output_fn, verify_zip=True)
+        self.assertFalse(os.path.exists(self.output_fn))
+        self.assertFalse(os.path.exists(self.output_fn + '.part'))
+
+    @responses.activate
+    def test_download_report(self):
+        responses.add(responses.GET, REPORT_URL, body=self.report, status=200)
+        jurisdiction = Jurisdiction(
+            url='https://results.enr.clarityelections.com/KY/15261/30235/en/summary.html',
+            level='state')
+
+        result = jurisdiction.download_report('xml', self.output_fn)
+
+        self.assertEqual(self.read_output(), self.report)
+        self.assertEqual(result.url, REPORT_URL)
+
+
+class TestDownloadAllReports(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        report = io.BytesIO()
+        with zipfile.ZipFile(report, 'w') as archive:
+            archive.writestr('detail.xml', '<ElectionResult/>')
+        self.report = report.getvalue()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @responses.activate
+    def test_download_all_reports(self):
+        base_url = 'https://results.enr.clarityelections.com/KY'
+        url = base_url + '/15261/30235/Web01/en/summary.html'
+        counties = [
+            'Adair|15262|30236|11/8/2016 10:01:02 PM EST|16',
+            'Allen|15263|30237|11/8/2016 10:01:02 PM EST|16',
+            'Anderson|15264|30238|11/8/2016 10:01:02 PM EST|16',
+        ]
+        responses.add(responses.GET, url.replace('summary.html', 'json/electionsettings.json'),
+                      json={'settings': {'electiondetails': {'participatingcounties': counties}}})
+        responses.add(responses.GET, base_url + '/Adair/15262/30236/reports/detailxml.zip',
+                      body=self.report)
+        # Transient errors should be retried, but missing reports should not
+        responses.add(responses.GET, base_url + '/Allen/15263/30237/reports/detailxml.zip',
+                      status=503)
+        responses.add(responses.GET, base_url + '/Allen/15263/30237/reports/detailxml.zip',
+                      body=self.report)
+        responses.add(responses.GET, base_url + '/Anderson/15264/30238/reports/detailxml.zip',
+                      status=404)
+
+        transport = Transport(policy=TransportPolicy(backoff=0))
+        jurisdiction = Jurisdiction(url=url, level='state', transport=transport)
+        manifest = jurisdiction.download_all_reports('xml', self.directory, max_workers=3)
+
+        self.assertEqual([entry.name for entry in manifest], ['Adair', 'Allen', 'Anderson'])
+        self.assertEqual([entry.version for entry in manifest], ['30236', '30237', '30238'])
+        for entry in manifest[:2]:
+            self.assertIsNone(entry.error)
+            self.assertEqual(entry.path, os.path.join(self.directory, entry.name + '_detailxml.zip'))
+            self.assertEqual(entry.size, len(self.report))
+            with open(entry.path, 'rb') as f:
+                self.assertEqual(f.read(), self.report)
+        self.assertIsInstance(manifest[2].error, requests.HTTPError)
+        self.assertIsNone(manifest[2].path)
+        anderson_calls = [call for call in responses.calls if '/Anderson/' in call.request.url]
+        self.assertEqual(len(anderson_calls), 1)
+
+    def test_timeouts_not_retried_twice(self):
+        # The transport has already retried the request
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = requests.exceptions.ConnectTimeout()
+        transport = Transport(session=session, policy=TransportPolicy(retries=3, backoff=0))
+        jurisdiction = Jurisdiction(url=REPORT_URL.replace('reports/detailxml.zip', 'en/summary.html'),
+                                    level='county', transport=transport)
+
+        entry = jurisdiction._download_report_with_retries('xml', os.path.join(self.directory, 'detailxml.zip'))
+
+        self.assertIsInstance(entry.error, requests.exceptions.ConnectTimeout)
+        self.assertEqual(session.request.call_count, 4)
+
+    def test_interrupted_download_retried(self):
+        def interrupted(chunk_size):
+            yield self.report[:10]
+            raise requests.exceptions.ConnectionError('Read timed out')
+
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = [
+            mock.Mock(status_code=200, headers={'ETag': '"v1"'}, iter_content=interrupted),
+            mock.Mock(status_code=206, headers={'ETag': '"v1"'},
+                      iter_content=mock.Mock(return_value=[self.report[10:]])),
+        ]
+        transport = Transport(session=session, policy=TransportPolicy(backoff=0))
+        jurisdiction = Jurisdiction(url=REPORT_URL.replace('reports/detailxml.zip', 'en/summary.html'),
+                                    level='county', transport=transport)
+        output_fn = os.path.join(self.directory, 'detailxml.zip')
+
+        entry = jurisdiction._download_report_with_retries('xml', output_fn)
+
+        self.assertIsNone(entry.error)
+        self.assertEqual(session.request.call_args[1]['headers']['Range'], 'bytes=10-')
+        with open(output_fn, 'rb') as f:
+            self.assertEqual(f.read(), self.report)
+
+
+class TestTransport(TestCase):
+    def test_request(self):
+        session = mock.Mock(spec=requests.Session)
+        transport = Transport(session=session, policy=TransportPolicy(timeout=5))
+
+        transport.get(REPORT_URL, headers={'Range': 'bytes=0-0'})
+
+        session.request.assert_called_once_with(
+            'GET', REPORT_URL, headers=dict(UA_HEADER, Range='bytes=0-0'), timeout=5)
+
+    def test_default_transport(self):
+        # Jurisdictions created without a transport share one
+        first = Jurisdiction(url='https://results.enr.clarityelections.com/KY/15261/30235/en/summary.html',
+                             level='state')
+        second = Jurisdiction(url='https://results.enr.clarityelections.com/GA/63991/184321/en/summary.html',
+                              level='state')
+        self.assertIs(first.transport, get_default_transport())
+        self.assertIs(second.transport, first.transport)
+
+    def test_executor(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        with Transport(executor=executor) as transport:
+            self.assertIs(transport.executor, executor)
+            self.assertEqual(transport.submit(sum, [1, 2]).result(), 3)
+
+        with self.assertRaises(RuntimeError):
+            executor.submit(sum, [1, 2])
+
+    @responses.activate
+    def test_shared_with_subjurisdictions(self):
+        url = 'https://results.enr.clarityelections.com/KY/15261/30235/Web01/en/summary.html'
+        responses.add(responses.GET, url.replace('summary.html', 'json/electionsettings.json'),
+                      json={'settings': {'electiondetails': {'participatingcounties': [
+                          'Adair|15262|30236|11/8/2016 10:01:02 PM EST|16',
+                      ]}}})
+        transport = Transport(max_workers=2, pool_size=2)
+
+        jurisdiction = Jurisdiction(url=url, level='state', transport=transport)
+        subjurisdictions = jurisdiction.get_subjurisdictions()
+
+        self.assertIs(subjurisdictions[0].transport, transport)
+        self.assertIsNotNone(Jurisdiction(url=url, level='state').transport)
+
+
+class TestTransportPolicy(TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.transport = Transport(session=self.session, policy=TransportPolicy(retries=2, backoff=0))
+
+    def mock_response(self, status_code):
+        return mock.Mock(spec=requests.Response, status_code=status_code)
+
+    def test_retry_status(self):
+        self.session.request.side_effect = [self.mock_response(503), self.mock_response(200)]
+
+        r = self.transport.get(REPORT_URL)
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.session.request.call_count, 2)
+
+    def test_retry_connection_error(self):
+        self.session.request.side_effect = [requests.exceptions.ConnectionError(), self.mock_response(200)]
+
+        self.assertEqual(self.transport.get(REPORT_URL).status_code, 200)
+
+    def test_retries_exhausted(self):
+        self.session.request.side_effect = requests.exceptions.Timeout()
+
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.transport.get(REPORT_URL)
+        self.assertEqual(self.session.request.call_count, 3)
+
+        self.session.request.side_effect = None
+        self.session.request.return_value = self.mock_response(502)
+        self.assertEqual(self.transport.get(REPORT_URL).status_code, 502)
+
+    def test_client_error_not_retried(self):
+        self.session.request.return_value = self.mock_response(404)
+
+        self.assertEqual(self.transport.get(REPORT_URL).status_code, 404)
+        self.assertEqual(self.session.request.call_count, 1)
+
+    def test_backoff(self):
+        policy = TransportPolicy(backoff=1, max_backoff=5)
+        for attempt, maximum in [(1, 1), (2, 2), (3, 4), (4, 5), (10, 5)]:
+            for i in range(20):
+                self.assertTrue(0 <= policy.get_backoff(attempt) <= maximum)
+
+    def test_rate_limit(self):
+        policy = TransportPolicy(max_requests_per_second=50)
+        start = time.monotonic()
+        for i in range(6):
+            policy.wait_for_host(REPORT_URL)
+            # Other hosts aren't limited
+            policy.wait_for_host('https://example.com/')
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
@@ -0,0 +1,112 @@
+import itertools
+import unittest
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+import responses
+
+from clarify.jurisdiction import Jurisdiction, discovery_cache
+from clarify.transport import Transport, TransportPolicy
+from clarify.watch import AsyncVersionWatcher, VersionChange, VersionWatcher
+
+BASE_URL = 'https://results.enr.clarityelections.com/KY/15261'
+CURRENT_VER_URL = BASE_URL + '/current_ver.txt'
+
+
+class TestVersionWatcher(unittest.TestCase):
+    def setUp(self):
+        self.transport = Transport(policy=TransportPolicy(retries=0))
+        discovery_cache.clear()
+
+    @responses.activate
+    def test_poll(self):
+        jurisdictions = [
+            Jurisdiction(url=BASE_URL + '/en/summary.html', level='state', transport=self.transport),
+            # Jurisdictions with the same current_ver.txt should only be
+            # polled once
+            Jurisdiction(url=BASE_URL + '/30234/Web01/en/summary.html', level='state', transport=self.transport),
+        ]
+        watcher = VersionWatcher(jurisdictions, fmt='xml')
+        responses.add(responses.GET, CURRENT_VER_URL, body='30235\n')
+
+        changes = watcher.poll()
+        self.assertEqual(changes, [
+            VersionChange(jurisdictions[0], None, '30235', BASE_URL + '/30235/reports/detailxml.zip'),
+        ])
+        self.assertEqual(jurisdictions[0].current_ver, '30235')
+        self.assertEqual(len(responses.calls), 1)
+
+        # Unchanged and older versions aren't changes
+        self.assertEqual(watcher.poll(), [])
+        responses.replace(responses.GET, CURRENT_VER_URL, body='30234')
+        self.assertEqual(watcher.poll(), [])
+
+        responses.replace(responses.GET, CURRENT_VER_URL, body='30236')
+        change, = watcher.poll()
+        self.assertEqual((change.old_ver, change.new_ver), ('30235', '30236'))
+        self.assertEqual(change.report_url, BASE_URL + '/30236/reports/detailxml.zip')
+        self.assertEqual(jurisdictions[0]._get_report_url('xml'), change.report_url)
+
+    @responses.activate
+    def test_poll_errors_skipped(self):
+        jurisdiction = Jurisdiction(url=BASE_URL + '/30235/en/summary.html', level='state',
+                                    transport=self.transport)
+        watcher = VersionWatcher([jurisdiction])
+
+        responses.add(responses.GET, CURRENT_VER_URL, status=503)
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(watcher.poll(), [])
+
+    @responses.activate
+    def test_iter(self):
+        jurisdiction = Jurisdiction(url=BASE_URL + '/en/summary.html', level='state', transport=self.transport)
+        for version in ['30235', '30235', '30236']:
+            responses.add(responses.GET, CURRENT_VER_URL, body=version)
+
+        changes = list(itertools.islice(VersionWatcher([jurisdiction], interval=0), 2))
+
+        self.assertEqual([change.new_ver for change in changes], ['30235', '30236'])
+        self.assertEqual(len(responses.calls), 3)
+
+    def test_async_jurisdiction_rejected(self):
+        jurisdiction = Jurisdiction(url=BASE_URL + '/en/summary.html', level='state', transport=self.transport)
+        with self.assertRaises(TypeError):
+            AsyncVersionWatcher([jurisdiction])
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncVersionWatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_iter(self):
+        from clarify.async_jurisdiction import AsyncClient, AsyncJurisdiction
+
+        versions = iter(['30235', '30235', '30236', '30237'])
+        polls = []
+
+        def handler(request):
+            polls.append(request)
+            return httpx.Response(200, text=next(versions))
+
+        client = AsyncClient(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        async with client:
+            jurisdiction = AsyncJurisdiction(url=BASE_URL + '/en/summary.html', level='state', client=client)
+            watcher = AsyncVersionWatcher([jurisdiction], interval=0, maxsize=1)
+            changes = []
+            async for change in watcher:
+                changes.append(change)
+                if len(changes) == 2:
+                    break
+
+        self.assertEqual([(c.old_ver, c.new_ver) for c in changes], [(None, '30235'), ('30235', '30236')])
+        self.assertEqual(changes[1].report_url, BASE_URL + '/30236/reports/detailxml.zip')
+        # With a queue of one change, polling can only get one change ahead
+        self.assertLessEqual(len(polls), 4)
+
+    async def test_sync_watcher_rejects_async_jurisdiction(self):
+        from clarify.async_jurisdiction import AsyncClient, AsyncJurisdiction
+
+        async with AsyncClient() as client:
+            jurisdiction = AsyncJurisdiction(url=BASE_URL + '/en/summary.html', level='state', client=client)
+            with self.assertRaises(TypeError):
+                VersionWatcher([jurisdiction])